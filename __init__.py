@@ -1,7 +1,9 @@
 from helper_utils.filesystem import filesystem as FileSystem
 from helper_utils.git import git_mgr as Git
 from helper_utils.log import logger as Logger
+from helper_utils.logreader import logReader as LogReader
 from helper_utils.sql import sql as Sql
+from helper_utils.sql import async_sql as AsyncSql
 from helper_utils.sh import shell as Shell
 from helper_utils.tar import tar as Tar
 
@@ -0,0 +1,504 @@
+import asyncio
+import datetime
+import os
+import sqlite3
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from helper_utils.filestats import fileStats, bulkStats
+import multiprocessing
+from helper_utils.log import logger, logCollector
+from helper_utils.logreader import logReader
+from helper_utils.sql import sql, async_sql
+from helper_utils.sh import shell
+
+"""Benchmarks for helper_utils hot paths.
+
+Run with 'python3 -m helper_utils.bench <name> [args...]', or with no name to list them.
+Each benchmark builds its own scratch data in a temp directory and removes it afterwards."""
+
+
+def _timeit(func, count):
+	"""Helper function, runs func() 'count' times and returns total seconds elapsed."""
+
+	start = time.perf_counter()
+	for i in range(count):
+		func()
+	return time.perf_counter() - start
+
+def _report(name, count, seconds):
+	per_call = (seconds / count) * 1000000 if count else 0
+	print(f"{name}: {count} calls in {seconds:.3f}s ({per_call:.3f}us/call)")
+
+def _make_files(path, count):
+	"""Helper function, creates 'count' small files under 'path' and returns their paths."""
+
+	files = []
+	for i in range(count):
+		filepath = os.path.join(path, f"file_{i}.txt")
+		with open(filepath, 'w') as f:
+			f.write(str(i))
+			f.close()
+		files.append(filepath)
+	return files
+
+def bench_filestats(count=1000):
+	"""Compares fileStats with the in-process os.stat backend against the 'stat' subprocess backend."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		files = _make_files(tmpdir, count)
+		it = iter(files * 2)
+		seconds = _timeit(lambda: fileStats(next(it), backend='stat'), count)
+		_report("fileStats(backend='stat')", count, seconds)
+		shell_seconds = seconds
+		seconds = _timeit(lambda: fileStats(next(it), backend='os'), count)
+		_report("fileStats(backend='os')", count, seconds)
+		print(f"speedup: {shell_seconds / seconds:.1f}x")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def _make_tree(path, count, per_dir=1000):
+	"""Helper function, creates 'count' empty files spread over subdirectories of 'per_dir' files each."""
+
+	for i in range(count):
+		if i % per_dir == 0:
+			subdir = os.path.join(path, f"dir_{i // per_dir}")
+			os.mkdir(subdir)
+		open(os.path.join(subdir, f"file_{i}"), 'w').close()
+
+def bench_bulkstats(count=1000000, threads=8, sample=10000):
+	"""Time and memory for bulkStats() over a 'count' file tree, against per-file fileStats() on a sample."""
+
+	count, threads, sample = int(count), int(threads), int(sample)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		print(f"creating {count} files...")
+		_make_tree(tmpdir, count)
+		for n in (1, threads):
+			start = time.perf_counter()
+			cols = bulkStats(tmpdir, threads=n)
+			seconds = time.perf_counter() - start
+			print(f"bulkStats(threads={n}): {len(cols)} files in {seconds:.3f}s ({len(cols) / seconds:.0f} files/s)")
+		del cols
+		tracemalloc.start()
+		cols = bulkStats(tmpdir, threads=threads)
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		print(f"bulkStats memory: {current / 1048576:.1f}MB held, {peak / 1048576:.1f}MB peak ({current / len(cols):.0f} bytes/file)")
+		files = cols.paths[:sample]
+		del cols
+		tracemalloc.start()
+		start = time.perf_counter()
+		stats = [fileStats(filepath) for filepath in files]
+		seconds = time.perf_counter() - start
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		print(f"fileStats per file (sample of {len(files)}): {len(files) / seconds:.0f} files/s, {current / len(files):.0f} bytes/file")
+	finally:
+		shutil.rmtree(tmpdir)
+
+class _dictBacked():
+	"""Stand-in for the old per-field classes, which copied every string into an instance __dict__."""
+
+	def __init__(self, data):
+		self.__dict__.update(data)
+
+def _legacy_stats(stats):
+	return [_dictBacked(view.asDict()) for view in stats.getStats()]
+
+def _measure(func):
+	tracemalloc.start()
+	start = time.perf_counter()
+	held = func()
+	seconds = time.perf_counter() - start
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return held, current, seconds
+
+def bench_records(count=100000):
+	"""Memory held by 'count' fileStats objects (slotted records) against the old dict-backed layout."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		files = _make_files(tmpdir, count)
+		held, current, seconds = _measure(lambda: [fileStats(filepath, cache=False) for filepath in files])
+		print(f"fileStats records (cache=False): {current / count:.0f} bytes/file, {current / 1048576:.1f}MB total ({seconds:.2f}s)")
+		held, current, seconds = _measure(lambda: [_legacy_stats(stats) for stats in held])
+		print(f"dict-backed Owner/Permissions/...: {current / count:.0f} bytes/file, {current / 1048576:.1f}MB total ({seconds:.2f}s)")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_log_disabled(count=1000000):
+	"""Per-call overhead of log_msg() for a disabled level (debug, with the default level at warning)."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		log = logger(logfile=os.path.join(tmpdir, 'log.txt'), default_log_level='warning')
+		path = os.path.join(tmpdir, 'some', 'long', 'path', 'to', 'a', 'file.txt')
+		_report("log_msg(f-string, 'debug')", count, _timeit(lambda: log.log_msg(f"filesystem.snd():Removing file: {path}...", 'debug'), count))
+		_report("log_msg('%s', 'debug', path)", count, _timeit(lambda: log.log_msg("filesystem.snd():Removing file: %s...", 'debug', path), count))
+		_report("log_msg(callable, 'debug')", count, _timeit(lambda: log.log_msg(lambda: f"filesystem.snd():Removing file: {path}...", 'debug'), count))
+		_report("is_enabled('debug') guard", count, _timeit(lambda: log.is_enabled('debug') and log.log_msg(f"filesystem.snd():Removing file: {path}...", 'debug'), count))
+		_report("empty call (baseline)", count, _timeit(lambda: None, count))
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_log_json(count=200000):
+	"""Per-call cost of json_lines=True (with origin capture) against the plain-text paths, for an enabled level."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		loggers = [
+			("plain text (logging module)", logger(logfile=os.path.join(tmpdir, 'default.txt'))),
+			("plain text (logger-owned file)", logger(logfile=os.path.join(tmpdir, 'plain.txt'), max_bytes=1 << 40)),
+			("json_lines=True", logger(logfile=os.path.join(tmpdir, 'json.txt'), json_lines=True)),
+		]
+		for name, log in loggers:
+			_report(name, count, _timeit(lambda: log.log_msg("filesystem.snd():Removing file: %s...", 'info', tmpdir), count))
+			log.close()
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_log_search(size_mb=1024, queries=20):
+	"""Builds a ~'size_mb' text log, then times index building and random one-minute range queries against it."""
+
+	size_mb, queries = int(size_mb), int(queries)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		logfile = os.path.join(tmpdir, 'log.txt')
+		print(f"writing {size_mb}MB log...")
+		base = time.time() - 86400 * 365
+		i = 0
+		with open(logfile, 'w') as f:
+			while f.tell() < size_mb * 1048576:
+				lines = []
+				for j in range(10000):
+					stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(base + i))
+					lines.append(f"{stamp}.000000 INFO:filesystem.snd():Removing file: {tmpdir}/file_{i}.txt...\n")
+					i += 1
+				f.write(''.join(lines))
+		reader = logReader(logfile)
+		start = time.perf_counter()
+		entries = reader.update_index()
+		print(f"update_index: {entries} entries in {time.perf_counter() - start:.3f}s")
+		step = max(1, i // queries)
+		start = time.perf_counter()
+		found = 0
+		for q in range(queries):
+			begin = base + q * step
+			found += sum(1 for record in reader.search(begin, begin + 60, level='INFO'))
+		seconds = time.perf_counter() - start
+		print(f"search (1 minute ranges): {queries} queries, {found} records in {seconds:.3f}s ({seconds / queries * 1000:.2f}ms/query)")
+		start = time.perf_counter()
+		lines = reader.tail(100)
+		print(f"tail(100): {len(lines)} lines in {(time.perf_counter() - start) * 1000:.2f}ms")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def _collector_worker(address, count):
+	lg = logger(collector=address)
+	for i in range(count):
+		lg.log_msg(f"worker {os.getpid()}: record {i}", 'info')
+		if i % 100 == 0:# let the other workers' batches overlap this one's
+			time.sleep(0.01)
+	lg.close()
+
+def bench_log_collector(workers=3, count=2000):
+	"""Logs from 'workers' processes through one logCollector, then checks that range searches on the shared file
+	return every record in the range (the workers' batches arrive out of timestamp order)."""
+
+	workers, count = int(workers), int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		logfile = os.path.join(tmpdir, 'log.txt')
+		collector = logCollector(logfile, address=os.path.join(tmpdir, 'log.sock')).start()
+		start = time.perf_counter()
+		procs = [multiprocessing.Process(target=_collector_worker, args=(collector.address, count)) for i in range(workers)]
+		for proc in procs:
+			proc.start()
+		for proc in procs:
+			proc.join()
+		collector.stop()
+		seconds = time.perf_counter() - start
+		print(f"collector: {collector.received} records from {workers} workers in {seconds:.3f}s")
+		reader = logReader(logfile, index_every=4096)
+		stamps = sorted(datetime.datetime.fromisoformat(line[:26]).timestamp() for line in reader.tail(workers * count))
+		ranges = [(stamps[0], None), (stamps[len(stamps) // 3], stamps[2 * len(stamps) // 3]), (stamps[len(stamps) // 2], stamps[-1])]
+		for begin, end in ranges:
+			expected = sum(1 for ts in stamps if ts >= begin and (end is None or ts <= end))
+			found = sum(1 for record in reader.search(begin, end))
+			print(f"search({begin:.6f}, {end}): {found} of {expected} records{'' if found == expected else ' - MISSING RECORDS'}")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def _unpooled_query(database, query_string):
+	"""The old sql.query: a fresh connection per call, never closed."""
+
+	conn = sqlite3.connect(database)
+	cur = conn.cursor()
+	cur.execute(query_string)
+	return [row[0] for row in cur.fetchall()]
+
+def bench_sql_qps(count=20000, threads=4):
+	"""Queries per second for sql.query() with pooled connections against a new connection per call."""
+
+	count, threads = int(count), int(threads)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		database = os.path.join(tmpdir, 'bench.db')
+		with sql(database) as db:
+			db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY, key2 TEXT);")
+			db.send("INSERT INTO test (key2) VALUES ('a'), ('b'), ('c');")
+			query_string = "SELECT key2 FROM test WHERE key1 = 2;"
+			seconds = _timeit(lambda: _unpooled_query(database, query_string), count)
+			print(f"new connection per query: {count / seconds:.0f} queries/s")
+			seconds = _timeit(lambda: db.query(query_string), count)
+			print(f"pooled connection: {count / seconds:.0f} queries/s")
+			per_thread = count // threads
+			workers = [threading.Thread(target=_timeit, args=(lambda: db.query(query_string), per_thread)) for i in range(threads)]
+			start = time.perf_counter()
+			for worker in workers:
+				worker.start()
+			for worker in workers:
+				worker.join()
+			seconds = time.perf_counter() - start
+			print(f"pooled connection, {threads} threads: {per_thread * threads / seconds:.0f} queries/s")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_sql_insert(count=200000, chunk_size=10000, sample=2000):
+	"""Rows per second for sql.insert_many() against the old one-statement-and-commit-per-row insert (on a sample)."""
+
+	count, chunk_size, sample = int(count), int(chunk_size), int(sample)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		with sql(os.path.join(tmpdir, 'bench.db')) as db:
+			db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY AUTOINCREMENT, key2 TEXT, key3 BOOL);")
+			it = iter(range(sample))
+			seconds = _timeit(lambda: db.send(f"INSERT INTO test ('key2', 'key3') VALUES('row {next(it)}', 0);"), sample)
+			print(f"one INSERT + commit per row: {sample / seconds:.0f} rows/s")
+			start = time.perf_counter()
+			db.insert_many('test', ({'key2': f"row {i}", 'key3': i & 1} for i in range(count)), chunk_size=chunk_size)
+			seconds = time.perf_counter() - start
+			print(f"insert_many(chunk_size={chunk_size}): {count / seconds:.0f} rows/s")
+			start = time.perf_counter()
+			db.insert_many('test', ({'key1': i + 1, 'key2': f"upd {i}", 'key3': 1} for i in range(count)), chunk_size=chunk_size, on_conflict='update')
+			seconds = time.perf_counter() - start
+			print(f"insert_many(on_conflict='update'): {count / seconds:.0f} rows/s")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_sql_stream(count=1000000, batch_size=1000):
+	"""Time and peak memory scanning a 'count' row table with fetchall() against sql.stream() row types."""
+
+	count, batch_size = int(count), int(batch_size)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		with sql(os.path.join(tmpdir, 'bench.db')) as db:
+			db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY, key2 TEXT, key3 BOOL);")
+			db.insert_many('test', ({'key1': i, 'key2': f"row {i}", 'key3': i & 1} for i in range(count)))
+			query_string = "SELECT * FROM test;"
+			scans = [
+				("fetchall()", lambda: len(db.connect().execute(query_string).fetchall())),
+				("stream(row_type='tuple')", lambda: sum(1 for row in db.stream(query_string, batch_size=batch_size))),
+				("stream(row_type='dict')", lambda: sum(1 for row in db.stream(query_string, row_type='dict', batch_size=batch_size))),
+				("stream(row_type='namedtuple')", lambda: sum(1 for row in db.stream(query_string, row_type='namedtuple', batch_size=batch_size))),
+				("stream(column='key2')", lambda: sum(1 for value in db.stream(query_string, column='key2', batch_size=batch_size))),
+			]
+			for name, scan in scans:
+				start = time.perf_counter()
+				scan()
+				seconds = time.perf_counter() - start
+				tracemalloc.start()
+				scan()
+				current, peak = tracemalloc.get_traced_memory()
+				tracemalloc.stop()
+				print(f"{name}: {count / seconds:.0f} rows/s, {peak / 1048576:.1f}MB peak")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def _mixed_worker(func, stop, counts, index):
+	while not stop.is_set():
+		try:
+			func()
+			counts[index][0] += 1
+		except Exception:
+			counts[index][1] += 1
+
+def bench_sql_mixed(seconds=5, writers=2, readers=4):
+	"""Reads and writes per second (and failures) with concurrent writer/reader threads, for the default profile
+	against profile='wal' with read-only reader connections."""
+
+	seconds, writers, readers = float(seconds), int(writers), int(readers)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		for profile, use_readers in (('default', False), ('wal', True)):
+			with sql(os.path.join(tmpdir, f"{profile}.db"), profile=profile, readers=use_readers) as db:
+				db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY, key2 TEXT);")
+				db.insert_many('test', ({'key2': f"row {i}"} for i in range(10000)))
+				write = lambda: db.insert_many('test', ({'key2': 'new row'} for i in range(100)))
+				read = lambda: db.query("SELECT key2 FROM test ORDER BY key1 DESC LIMIT 100;")
+				funcs = [write] * writers + [read] * readers
+				counts = [[0, 0] for func in funcs]
+				stop = threading.Event()
+				workers = [threading.Thread(target=_mixed_worker, args=(func, stop, counts, i)) for i, func in enumerate(funcs)]
+				for worker in workers:
+					worker.start()
+				time.sleep(seconds)
+				stop.set()
+				for worker in workers:
+					worker.join()
+				done = [sum(c[0] for c in counts[:writers]), sum(c[0] for c in counts[writers:])]
+				failed = [sum(c[1] for c in counts[:writers]), sum(c[1] for c in counts[writers:])]
+				print(f"profile={profile}, readers={use_readers}: {done[0] * 100 / seconds:.0f} rows written/s, {done[1] / seconds:.0f} reads/s, {failed[0]} failed writes, {failed[1]} failed reads")
+	finally:
+		shutil.rmtree(tmpdir)
+
+async def _loop_lag(lags, interval=0.005):
+	while True:
+		start = time.perf_counter()
+		await asyncio.sleep(interval)
+		lags.append(time.perf_counter() - start - interval)
+
+async def _sql_async(database, count):
+	async with async_sql(database, profile='wal') as db:
+		await db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY, key2 TEXT);")
+		lags = []
+		ticker = asyncio.create_task(_loop_lag(lags))
+		start = time.perf_counter()
+		load = asyncio.create_task(db.insert_many('test', ({'key2': f"row {i}"} for i in range(count))))
+		reads = 0
+		while not load.done():
+			await db.query("SELECT key2 FROM test ORDER BY key1 DESC LIMIT 10;")
+			reads += 1
+		await load
+		seconds = time.perf_counter() - start
+		streamed = 0
+		async for row in db.stream("SELECT * FROM test;", row_type='dict'):
+			streamed += 1
+		ticker.cancel()
+		lags.sort()
+		print(f"insert_many: {count / seconds:.0f} rows/s, {reads / seconds:.0f} concurrent reads/s")
+		print(f"stream(): {streamed} rows")
+		print(f"event loop lag: median {lags[len(lags) // 2] * 1000:.2f}ms, max {lags[-1] * 1000:.2f}ms over {len(lags)} ticks")
+
+def bench_sql_async(count=500000):
+	"""Event-loop lag while async_sql bulk-loads 'count' rows, reads concurrently and then streams them back."""
+
+	tmpdir = tempfile.mkdtemp()
+	try:
+		asyncio.run(_sql_async(os.path.join(tmpdir, 'bench.db'), int(count)))
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_sql_io(count=500000):
+	"""Rows per second exporting a 'count' row table to CSV/JSON lines and importing it back, direct and staged."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		with sql(os.path.join(tmpdir, 'bench.db')) as db:
+			db.send("CREATE TABLE test (key1 INTEGER PRIMARY KEY, key2 TEXT, key3 BOOL);")
+			db.send("CREATE TABLE copy (key1 INTEGER PRIMARY KEY, key2 TEXT, key3 BOOL);")
+			db.insert_many('test', ({'key1': i, 'key2': f"row {i}", 'key3': i & 1} for i in range(count)))
+			for fmt in ('csv', 'jsonl'):
+				filepath = os.path.join(tmpdir, f"test.{fmt}")
+				report = db.export_table('test', filepath)
+				print(f"export_table({fmt}): {report['rows_per_sec']:.0f} rows/s, {os.path.getsize(filepath) / 1048576:.1f}MB")
+				for staging in (False, True):
+					db.send("DELETE FROM copy;")
+					report = db.import_file('copy', filepath, staging=staging)
+					print(f"import_file({fmt}, staging={staging}): {report['rows_per_sec']:.0f} rows/s")
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_spawn(count=10000):
+	"""Spawn latency of shell.sh() with a command string (through /bin/sh) against an argv list (exec'd directly)."""
+
+	count = int(count)
+	tmpdir = tempfile.mkdtemp()
+	try:
+		run = shell().sh
+		seconds = _timeit(lambda: run(f"ls -d \"{tmpdir}\""), count)
+		_report("sh(string)", count, seconds)
+		string_seconds = seconds
+		seconds = _timeit(lambda: run(["ls", "-d", tmpdir]), count)
+		_report("sh(argv)", count, seconds)
+		print(f"speedup: {string_seconds / seconds:.2f}x")
+		_report("sh(argv, cwd=...)", count, _timeit(lambda: run(["ls", "-d", "."], cwd=tmpdir), count))
+	finally:
+		shutil.rmtree(tmpdir)
+
+def bench_run_many(count=200, workers=8, sleep=0.02):
+	"""Wall time for 'count' short commands (each sleeping 'sleep' seconds, like a network-bound git status) run one
+	at a time with shell.sh() against shell.run_many() with 'workers' threads."""
+
+	count, workers = int(count), int(workers)
+	com = ["sleep", str(sleep)]
+	run = shell()
+	seconds = _timeit(lambda: run.sh(com), count)
+	print(f"sh() sequential: {count} commands in {seconds:.2f}s")
+	start = time.perf_counter()
+	results = list(run.run_many([com] * count, workers=workers))
+	seconds = time.perf_counter() - start
+	failed = sum(1 for result in results if result.returncode != 0)
+	print(f"run_many(workers={workers}): {count} commands in {seconds:.2f}s, {failed} failed")
+
+def bench_lines(count=5000000):
+	"""Time and peak memory reading 'count' lines of output with shell.sh() (buffered) against shell.lines()."""
+
+	com = ["seq", str(int(count))]
+	run = shell()
+	for name, consume in (("sh()", lambda: len(run.sh(com))), ("lines()", lambda: sum(1 for line in run.lines(com)))):
+		start = time.perf_counter()
+		total = consume()
+		seconds = time.perf_counter() - start
+		tracemalloc.start()
+		consume()
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		print(f"{name}: {total} lines in {seconds:.2f}s, {peak / 1048576:.1f}MB peak")
+	run_lines = run.lines(["yes"])
+	next(run_lines)
+	start = time.perf_counter()
+	run_lines.close()
+	print(f"lines() cancel (kills the child): {(time.perf_counter() - start) * 1000:.2f}ms")
+
+async def _async_sh(count, limit, sleep):
+	run = shell()
+	lags = []
+	ticker = asyncio.create_task(_loop_lag(lags))
+	start = time.perf_counter()
+	results = await run.gather([["sleep", str(sleep)]] * count, limit=limit)
+	seconds = time.perf_counter() - start
+	ticker.cancel()
+	lags.sort()
+	failed = sum(1 for result in results if result.returncode != 0)
+	print(f"gather(limit={limit}): {count} commands in {seconds:.2f}s, {failed} failed")
+	print(f"event loop lag: median {lags[len(lags) // 2] * 1000:.2f}ms, max {lags[-1] * 1000:.2f}ms over {len(lags)} ticks")
+
+def bench_async_sh(count=500, limit=100, sleep=0.05):
+	"""Wall time and event-loop lag for 'count' commands through shell.gather() with 'limit' children at a time."""
+
+	asyncio.run(_async_sh(int(count), int(limit), sleep))
+
+benchmarks = {'filestats': bench_filestats, 'bulkstats': bench_bulkstats, 'records': bench_records, 'log_disabled': bench_log_disabled, 'log_json': bench_log_json, 'log_search': bench_log_search, 'log_collector': bench_log_collector, 'sql_qps': bench_sql_qps, 'sql_insert': bench_sql_insert, 'sql_stream': bench_sql_stream, 'sql_mixed': bench_sql_mixed, 'sql_async': bench_sql_async, 'sql_io': bench_sql_io, 'spawn': bench_spawn, 'run_many': bench_run_many, 'lines': bench_lines, 'async_sh': bench_async_sh}
+
+if __name__ == "__main__":
+	try:
+		name = sys.argv[1]
+	except IndexError:
+		print("Available benchmarks:", ", ".join(benchmarks))
+		exit()
+	if name not in benchmarks:
+		print(f"unknown benchmark:{name}!")
+		exit()
+	benchmarks[name](*sys.argv[2:])
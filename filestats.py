@@ -1,117 +1,367 @@
+from array import array
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from functools import lru_cache
+import ctypes
+import ctypes.util
+import atexit
+import grp
+import hashlib
+import mmap
+import os
+import pwd
+import queue
+import sqlite3
+import stat
 import subprocess
+import threading
+import time
 
 _print = locals()['__builtins__']['print']
 
 def print(val):
 	classes = (Owner, Permissions, Created, Modified, Changed, Accessed)
 	if isinstance(val, classes):
-		_print(f"{val.__class__}:", val.__dict__)
+		_print(f"{val.__class__}:", val.asDict())
 	else:
 		_print(val)
 
+class statRecord():
+	# one compact record per file: integer ids/mode and nanosecond timestamps, strings are built on access.
+	__slots__ = ('mode', 'uid', 'gid', 'size', 'birth_ns', 'mtime_ns', 'ctime_ns', 'atime_ns')
+	def __init__(self, mode, uid, gid, size, birth_ns, mtime_ns, ctime_ns, atime_ns):
+		self.mode = mode
+		self.uid = uid
+		self.gid = gid
+		self.size = size
+		self.birth_ns = birth_ns
+		self.mtime_ns = mtime_ns
+		self.ctime_ns = ctime_ns
+		self.atime_ns = atime_ns
+	@classmethod
+	def fromStat(cls, st, birth_ns=None):
+		if birth_ns is None:# no birth time on this kernel/filesystem, ctime is the closest we have
+			birth_ns = st.st_ctime_ns
+		return cls(st.st_mode, st.st_uid, st.st_gid, st.st_size, birth_ns, st.st_mtime_ns, st.st_ctime_ns, st.st_atime_ns)
+
 class Owner():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
+	__slots__ = ('uid', 'gid')
+	def __init__(self, uid, gid):
+		self.uid = uid
+		self.gid = gid
+	@property
+	def user_id(self):
+		return str(self.uid)
+	@property
+	def user_name(self):
+		return userName(self.uid)
+	@property
+	def group_id(self):
+		return str(self.gid)
+	@property
+	def group_name(self):
+		return groupName(self.gid)
+	def asDict(self):
+		return {'user_id': self.user_id, 'user_name': self.user_name, 'group_id': self.group_id, 'group_name': self.group_name}
 
 class Permissions():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
-
-class Created():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
-
-class Modified():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
-
-class Changed():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
-
-class Accessed():
-	def __init__(self, data):
-		for k in data:
-			v = data[k]
-			self.__dict__[k] = v
+	__slots__ = ('mode',)
+	def __init__(self, mode):
+		self.mode = mode
+	@property
+	def numeric(self):
+		return f"{stat.S_IMODE(self.mode):04o}"
+	@property
+	def ascii(self):
+		return stat.filemode(self.mode)
+	def asDict(self):
+		return {'numeric': self.numeric, 'ascii': self.ascii}
+
+class _timeView():
+	# same fields the 'stat' command output was parsed into, computed from integer nanoseconds.
+	__slots__ = ('ns',)
+	def __init__(self, ns):
+		self.ns = ns
+	@property
+	def date(self):
+		return datetime.fromtimestamp(self.ns // 1000000000).strftime('%Y-%m-%d')
+	@property
+	def time(self):
+		secs, nsecs = divmod(self.ns, 1000000000)
+		return f"{datetime.fromtimestamp(secs).strftime('%H:%M:%S')}.{nsecs:09d}"
+	@property
+	def strptime(self):
+		return f"{self.date}-{self.time}"
+	@property
+	def ts(self):
+		return self.ns / 1000000000
+	def asDict(self):
+		return {'date': self.date, 'time': self.time, 'strptime': self.strptime, 'ts': self.ts, 'ns': self.ns}
+
+class Created(_timeView):
+	__slots__ = ()
+
+class Modified(_timeView):
+	__slots__ = ()
+
+class Changed(_timeView):
+	__slots__ = ()
+
+class Accessed(_timeView):
+	__slots__ = ()
+
+# statx(2) constants, used to read birth time where the kernel and filesystem record it.
+AT_FDCWD = -100
+AT_SYMLINK_NOFOLLOW = 0x100
+STATX_BTIME = 0x800
+
+class _statxTimestamp(ctypes.Structure):
+	_fields_ = [('tv_sec', ctypes.c_int64), ('tv_nsec', ctypes.c_uint32), ('_reserved', ctypes.c_int32)]
+
+class _statxBuffer(ctypes.Structure):
+	_fields_ = [('stx_mask', ctypes.c_uint32), ('stx_blksize', ctypes.c_uint32), ('stx_attributes', ctypes.c_uint64), ('stx_nlink', ctypes.c_uint32), ('stx_uid', ctypes.c_uint32), ('stx_gid', ctypes.c_uint32), ('stx_mode', ctypes.c_uint16), ('_spare0', ctypes.c_uint16), ('stx_ino', ctypes.c_uint64), ('stx_size', ctypes.c_uint64), ('stx_blocks', ctypes.c_uint64), ('stx_attributes_mask', ctypes.c_uint64), ('stx_atime', _statxTimestamp), ('stx_btime', _statxTimestamp), ('stx_ctime', _statxTimestamp), ('stx_mtime', _statxTimestamp), ('_spare', ctypes.c_uint64 * 16)]
+
+def _load_statx():
+	try:
+		libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+		func = libc.statx
+	except (OSError, AttributeError, TypeError):
+		return None
+	func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_statxBuffer)]
+	func.restype = ctypes.c_int
+	return func
+
+_statx = _load_statx()
+
+def birthTimeNs(filepath, follow_symlinks=False, st=None):
+	# returns birth time in nanoseconds, or None if neither statx nor st_birthtime can provide it.
+	if _statx is not None:
+		buf = _statxBuffer()
+		flags = 0 if follow_symlinks else AT_SYMLINK_NOFOLLOW
+		if _statx(AT_FDCWD, os.fsencode(filepath), flags, STATX_BTIME, ctypes.byref(buf)) == 0 and buf.stx_mask & STATX_BTIME:
+			return buf.stx_btime.tv_sec * 1000000000 + buf.stx_btime.tv_nsec
+	if st is not None and hasattr(st, 'st_birthtime'):
+		return int(st.st_birthtime * 1000000000)
+	return None
+
+@lru_cache(maxsize=None)
+def userName(uid):
+	try:
+		return pwd.getpwuid(uid).pw_name
+	except KeyError:
+		return 'UNKNOWN'
+
+@lru_cache(maxsize=None)
+def groupName(gid):
+	try:
+		return grp.getgrgid(gid).gr_name
+	except KeyError:
+		return 'UNKNOWN'
+
+class statCache():
+	# process-wide LRU of (stat_result, birth_ns), keyed by (st_dev, st_ino, path).
+	# By default (ttl=0) every lookup re-stats the file, and the entry (with its birth time, saving the statx call)
+	# is kept if inode, size, mtime and ctime are unchanged, so answers are never stale. A ttl > 0 (opt in with
+	# STAT_CACHE.configure(ttl=...)) returns entries younger than 'ttl' seconds without a syscall: changes made by
+	# other processes (tar, git, subprocesses) are then missed until it expires. ttl=None never expires.
+	def __init__(self, maxsize=65536, ttl=0):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._entries = OrderedDict()# (st_dev, st_ino, path) -> [stat_time, stat_result, birth_ns, follow_symlinks]
+		self._keys = {}# (path, follow_symlinks) -> (st_dev, st_ino, path)
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.revalidations = 0
+		self.evictions = 0
+	def configure(self, maxsize=None, ttl=False):
+		with self._lock:
+			if maxsize is not None:
+				self.maxsize = maxsize
+			if ttl is not False:
+				self.ttl = ttl
+			self._evict()
+	def _fresh(self, entry):
+		return self.ttl is None or time.monotonic() - entry[0] < self.ttl
+	def _evict(self):
+		while len(self._entries) > self.maxsize:
+			key, entry = self._entries.popitem(last=False)
+			self._keys.pop((key[2], entry[3]), None)
+			self.evictions += 1
+	def lookup(self, filepath, follow_symlinks=False):
+		filepath = os.fspath(filepath)
+		with self._lock:
+			key = self._keys.get((filepath, follow_symlinks))
+			entry = self._entries.get(key) if key is not None else None
+			if entry is not None and self._fresh(entry):
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return entry[1], entry[2]
+		st = os.stat(filepath) if follow_symlinks else os.lstat(filepath)
+		new_key = (st.st_dev, st.st_ino, filepath)
+		with self._lock:
+			revalidated = entry is not None and key == new_key and _sameFile(entry[1], st)
+			if revalidated:
+				birth_ns = entry[2]
+				self.revalidations += 1
+			else:
+				self.misses += 1
+			if key is not None and key != new_key:
+				self._entries.pop(key, None)
+		if not revalidated:
+			birth_ns = birthTimeNs(filepath, follow_symlinks=follow_symlinks, st=st)
+		with self._lock:
+			self._entries[new_key] = [time.monotonic(), st, birth_ns, follow_symlinks]
+			self._entries.move_to_end(new_key)
+			self._keys[(filepath, follow_symlinks)] = new_key
+			self._evict()
+		return st, birth_ns
+	def invalidate(self, filepath=None, recursive=False):
+		# drops one path (and everything below it if recursive), or the whole cache when filepath is None.
+		with self._lock:
+			if filepath is None:
+				self._entries.clear()
+				self._keys.clear()
+				return
+			filepath = os.fspath(filepath)
+			prefix = os.path.join(filepath, '')
+			for lookup_key in list(self._keys):
+				path = lookup_key[0]
+				if path == filepath or (recursive and path.startswith(prefix)):
+					self._entries.pop(self._keys.pop(lookup_key), None)
+	def info(self):
+		with self._lock:
+			return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations, 'evictions': self.evictions, 'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl}
+	def resetCounters(self):
+		with self._lock:
+			self.hits = self.misses = self.revalidations = self.evictions = 0
+
+def _sameFile(st1, st2):
+	return (st1.st_size, st1.st_mtime_ns, st1.st_ctime_ns) == (st2.st_size, st2.st_mtime_ns, st2.st_ctime_ns)
+
+STAT_CACHE = statCache()
+
+def cachedStat(filepath, follow_symlinks=False):
+	return STAT_CACHE.lookup(filepath, follow_symlinks=follow_symlinks)
+
+def invalidateStats(filepath=None, recursive=False):
+	STAT_CACHE.invalidate(filepath, recursive=recursive)
+
+def statCacheInfo():
+	return STAT_CACHE.info()
+
+def _compareNs(mine, theirs, tolerance_ns=0):
+	if mine - theirs > tolerance_ns:
+		ret = 'Newer'
+	elif theirs - mine > tolerance_ns:
+		ret = 'Older'
+	else:
+		ret = 'Same'
+	return ret
+
+_fileTypes = {'-': stat.S_IFREG, 'd': stat.S_IFDIR, 'l': stat.S_IFLNK, 'c': stat.S_IFCHR, 'b': stat.S_IFBLK, 'p': stat.S_IFIFO, 's': stat.S_IFSOCK}
+
+def _shellTimeNs(line):
+	# 'Modify: 2024-05-01 04:57:58.123456789 +0000' -> nanoseconds, None for 'Birth: -'
+	value = line.split(': ')[1].strip()
+	if value == '-':
+		return None
+	date, clock = value.rsplit(' ', 1)[0].split(' ')
+	secs, _, frac = clock.partition('.')
+	ts = datetime.strptime(f"{date} {secs}", '%Y-%m-%d %H:%M:%S').timestamp()
+	return int(ts) * 1000000000 + int(frac.ljust(9, '0')[:9])
 
 class fileStats():
-	def __init__(self, filepath='/var/storage/dev/python3/xrandr.py'):
+	__slots__ = ('filepath', 'backend', 'follow_symlinks', 'cache', 'record')
+	def __init__(self, filepath='/var/storage/dev/python3/xrandr.py', backend='os', follow_symlinks=False, cache=True):
+		if backend not in ('os', 'stat'):
+			raise ValueError(f"fileStats():Unknown backend: {backend} (use 'os' or 'stat')")
 		self.filepath = filepath
-		self.owner, self.permissions, self.created, self.modified, self.changed, self.accessed = self.getStats(self.filepath)
+		self.backend = backend
+		self.follow_symlinks = follow_symlinks
+		self.cache = cache
+		self.record = self.getRecord(self.filepath)
+	@property
+	def owner(self):
+		return Owner(self.record.uid, self.record.gid)
+	@property
+	def permissions(self):
+		return Permissions(self.record.mode)
+	@property
+	def created(self):
+		return Created(self.record.birth_ns)
+	@property
+	def modified(self):
+		return Modified(self.record.mtime_ns)
+	@property
+	def changed(self):
+		return Changed(self.record.ctime_ns)
+	@property
+	def accessed(self):
+		return Accessed(self.record.atime_ns)
 	def sh(self, com):
-		return subprocess.check_output(com, shell=True).decode().strip()
+		# argv lists run without /bin/sh, strings still go through it
+		return subprocess.check_output(com, shell=isinstance(com, str)).decode().strip()
 	def tsToSeconds(self, dt):
 		rounded = str(round(float(f"0.{dt.split('.')[1]}"), 6)).split('.')[1]
 		newdt = f"{dt.split('.')[0]}.{rounded}"
 		ts = datetime.strptime(newdt, '%Y-%m-%d-%H:%M:%S.%f').timestamp()
 		return ts
+	def _targetMtime(self, target):
+		# target may be a path or another fileStats object (no stat needed then)
+		if isinstance(target, fileStats):
+			return target.record.mtime_ns
+		return self.getRecord(target).mtime_ns
 	def isNewer(self, target):
-		OWNER, PERMISSIONS, CREATED, MODIFIED, CHANGED, ACCESSED = self.getStats(filepath=target)
-		return self.modified.ts > MODIFIED.ts
+		return self.record.mtime_ns > self._targetMtime(target)
 	def isOlder(self, target):
-		OWNER, PERMISSIONS, CREATED, MODIFIED, CHANGED, ACCESSED = self.getStats(filepath=target)
-		return self.modified.ts < MODIFIED.ts
-	def sameAs(self, target):
-		OWNER, PERMISSIONS, CREATED, MODIFIED, CHANGED, ACCESSED = self.getStats(filepath=target)
-		return self.modified.ts == MODIFIED.ts
+		return self.record.mtime_ns < self._targetMtime(target)
+	def sameAs(self, target, content=False):
+		# content=True compares file contents (size, then cached hash) instead of mtimes
+		if content:
+			if isinstance(target, fileStats):
+				target = target.filepath
+			return sameContent(self.filepath, target)
+		return self.record.mtime_ns == self._targetMtime(target)
 	def compare(self, target):
-		if self.isNewer(target):
-			ret = 'Newer'
-		elif self.isOlder(target):
-			ret = 'Older'
-		elif self.sameAs(target):
-			ret = 'Same'
-		return ret
+		return _compareNs(self.record.mtime_ns, self._targetMtime(target))
 	def getStats(self, filepath=None):
+		record = self.getRecord(filepath)
+		return Owner(record.uid, record.gid), Permissions(record.mode), Created(record.birth_ns), Modified(record.mtime_ns), Changed(record.ctime_ns), Accessed(record.atime_ns)
+	def getRecord(self, filepath=None):
 		if filepath is None:
 			filepath = self.filepath
-		out = {}
-		data = self.sh(f"stat \"{filepath}\"")
-		owner = {}
-		owner['user_id'] = data.split('Uid: ( ')[1].split('/')[0]
-		owner['user_name'] = data.split('Uid: ( ')[1].split('/')[1].split(')')[0].strip()
-		owner['group_id'] = data.split('Gid: ( ')[1].split('/')[0]
-		owner['group_name'] = data.split('Gid: ( ')[1].split('/')[1].split(')')[0].strip()
-		OWNER = Owner(owner)
+		if self.backend == 'stat':
+			return self._recordShell(filepath)
+		return self._recordOs(filepath)
+	def _recordOs(self, filepath):
+		if self.cache:
+			st, birth_ns = STAT_CACHE.lookup(filepath, follow_symlinks=self.follow_symlinks)
+		else:
+			if self.follow_symlinks:
+				st = os.stat(filepath)
+			else:
+				st = os.lstat(filepath)
+			birth_ns = birthTimeNs(filepath, follow_symlinks=self.follow_symlinks, st=st)
+		return statRecord.fromStat(st, birth_ns)
+	def _recordShell(self, filepath):
+		data = self.sh(["stat", filepath])
+		uid = int(data.split('Uid: ( ')[1].split('/')[0])
+		gid = int(data.split('Gid: ( ')[1].split('/')[0])
 		chunks = data.split('Uid:')[0].splitlines()
-		permissions = {}
-		permissions['numeric'] = chunks[len(chunks) - 1].split('(')[1].split('/')[0]
-		permissions['ascii'] = chunks[len(chunks) - 1].split('(')[1].split('/')[1].split(')')[0]
-		PERMISSIONS = Permissions(permissions)
-		created = {}
-		modified = {}
-		changed = {}
-		accessed = {}
+		numeric = chunks[len(chunks) - 1].split('(')[1].split('/')[0]
+		ascii = chunks[len(chunks) - 1].split('(')[1].split('/')[1].split(')')[0]
+		mode = int(numeric, 8) | _fileTypes.get(ascii[0], 0)
+		size = int(data.split('Size: ')[1].split()[0])
 		chunks = data.splitlines()
-		created['date'], created['time'] = chunks[len(chunks) - 1].split(': ')[1].split(' -')[0].split(' ')
-		created['strptime'] = f"{created['date']}-{created['time']}"
-		created['ts'] = self.tsToSeconds(created['strptime'])
-		CREATED = Created(created)
-		modified['date'], modified['time'] = chunks[len(chunks) - 3].split(': ')[1].split(' -')[0].split(' ')
-		modified['strptime'] = f"{modified['date']}-{modified['time']}"
-		modified['ts'] = self.tsToSeconds(modified['strptime'])
-		MODIFIED = Modified(modified)
-		changed['date'], changed['time'] = chunks[len(chunks) - 2].split(': ')[1].split(' -')[0].split(' ')
-		changed['strptime'] = f"{changed['date']}-{changed['time']}"
-		changed['ts'] = self.tsToSeconds(changed['strptime'])
-		CHANGED = Changed(changed)
-		accessed['date'], accessed['time'] = chunks[len(chunks) - 4].split(': ')[1].split(' -')[0].split(' ')
-		accessed['strptime'] = f"{accessed['date']}-{accessed['time']}"
-		accessed['ts'] = self.tsToSeconds(accessed['strptime'])
-		ACCESSED = Accessed(accessed)
-		return OWNER, PERMISSIONS, CREATED, MODIFIED, CHANGED, ACCESSED
+		birth_ns = _shellTimeNs(chunks[len(chunks) - 1])
+		mtime_ns = _shellTimeNs(chunks[len(chunks) - 3])
+		ctime_ns = _shellTimeNs(chunks[len(chunks) - 2])
+		atime_ns = _shellTimeNs(chunks[len(chunks) - 4])
+		if birth_ns is None:
+			birth_ns = ctime_ns
+		return statRecord(mode, uid, gid, size, birth_ns, mtime_ns, ctime_ns, atime_ns)
 
 class testFiles():
 	def __init__(self, file1=None, file2=None):
@@ -120,5 +370,332 @@ class testFiles():
 		self.FILE_1 = fileStats(self.filepath_1)
 		self.FILE_2 = fileStats(self.filepath_2)
 	def isNewer(self):
-		if self.FILE_1.created.ts > self.FILE_2.created.ts:
-			pass
+		return self.FILE_1.isNewer(self.FILE_2)
+	def isOlder(self):
+		return self.FILE_1.isOlder(self.FILE_2)
+	def sameAs(self, content=False):
+		return self.FILE_1.sameAs(self.FILE_2, content=content)
+	def compare(self):
+		return self.FILE_1.compare(self.FILE_2)
+
+class statColumns():
+	# columnar stat results: one list of paths plus one typed array per field, indexes line up.
+	def __init__(self):
+		self.paths = []
+		self.sizes = array('q')
+		self.mtimes = array('q')# nanoseconds
+		self.modes = array('L')
+		self.uids = array('L')
+	def __len__(self):
+		return len(self.paths)
+	def append(self, path, st):
+		self.paths.append(path)
+		self.sizes.append(st.st_size)
+		self.mtimes.append(st.st_mtime_ns)
+		self.modes.append(st.st_mode)
+		self.uids.append(st.st_uid)
+	def extend(self, other):
+		self.paths.extend(other.paths)
+		self.sizes.extend(other.sizes)
+		self.mtimes.extend(other.mtimes)
+		self.modes.extend(other.modes)
+		self.uids.extend(other.uids)
+	def row(self, idx):
+		return {'path': self.paths[idx], 'size': self.sizes[idx], 'mtime': self.mtimes[idx], 'mode': self.modes[idx], 'uid': self.uids[idx]}
+
+def _scanDir(path, follow_symlinks=False, include_dirs=False):
+	# stats one directory level, returns (statColumns, subdirectories). DirEntry caches d_type and its stat result.
+	cols = statColumns()
+	subdirs = []
+	try:
+		it = os.scandir(path)
+	except (FileNotFoundError, NotADirectoryError, PermissionError):
+		return cols, subdirs
+	with it:
+		for entry in it:
+			try:
+				is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+				if is_dir:
+					subdirs.append(entry.path)
+					if not include_dirs:
+						continue
+				cols.append(entry.path, entry.stat(follow_symlinks=follow_symlinks))
+			except (FileNotFoundError, PermissionError):# vanished or unreadable mid-scan
+				continue
+	return cols, subdirs
+
+def bulkStats(paths, threads=None, follow_symlinks=False, include_dirs=False):
+	# stats every file under 'paths' (a root directory, a file, or a list of either) into one statColumns.
+	# threads=None/1 walks on the calling thread, otherwise directories are spread across a thread pool.
+	if isinstance(paths, (str, bytes, os.PathLike)):
+		paths = [paths]
+	out = statColumns()
+	roots = []
+	for path in paths:
+		try:
+			st = os.stat(path) if follow_symlinks else os.lstat(path)
+		except FileNotFoundError:
+			continue
+		if stat.S_ISDIR(st.st_mode):
+			roots.append(os.fspath(path))
+			if include_dirs:
+				out.append(os.fspath(path), st)
+		else:
+			out.append(os.fspath(path), st)
+	if threads is None or threads <= 1:
+		while roots:
+			cols, subdirs = _scanDir(roots.pop(), follow_symlinks, include_dirs)
+			out.extend(cols)
+			roots.extend(subdirs)
+		return out
+	with ThreadPoolExecutor(max_workers=threads) as pool:
+		pending = set(pool.submit(_scanDir, root, follow_symlinks, include_dirs) for root in roots)
+		while pending:
+			done, pending = wait(pending, return_when=FIRST_COMPLETED)
+			for future in done:
+				cols, subdirs = future.result()
+				out.extend(cols)
+				for subdir in subdirs:
+					pending.add(pool.submit(_scanDir, subdir, follow_symlinks, include_dirs))
+	return out
+
+treeEntry = namedtuple('treeEntry', ['path', 'status', 'left', 'right'])# left/right are stat results or None
+
+def _sortedEntries(path, parts, follow_symlinks=False):
+	# one directory level sorted by name, as (relparts, fullpath, is_dir, stat_result or None)
+	out = []
+	try:
+		it = os.scandir(path)
+	except (FileNotFoundError, NotADirectoryError, PermissionError):
+		return out
+	with it:
+		for entry in it:
+			try:
+				if entry.is_dir(follow_symlinks=follow_symlinks):
+					out.append((parts + (entry.name,), entry.path, True, None))
+				else:
+					out.append((parts + (entry.name,), entry.path, False, entry.stat(follow_symlinks=follow_symlinks)))
+			except (FileNotFoundError, PermissionError):
+				continue
+	out.sort(key=lambda item: item[0][-1])
+	return out
+
+def walkSorted(root, follow_symlinks=False):
+	# yields (relparts, stat_result) for every non-directory under root, in path-component order.
+	# Only the listings of the directories on the current branch are held in memory.
+	stack = [iter(_sortedEntries(root, (), follow_symlinks))]
+	while stack:
+		try:
+			parts, path, is_dir, st = next(stack[-1])
+		except StopIteration:
+			stack.pop()
+			continue
+		if is_dir:
+			stack.append(iter(_sortedEntries(path, parts, follow_symlinks)))
+		else:
+			yield parts, st
+
+class _treeReader():
+	# runs walkSorted() for one side on its own thread, handing batches over a bounded queue.
+	def __init__(self, root, follow_symlinks=False, batch_size=1024, depth=16):
+		self.root = root
+		self.follow_symlinks = follow_symlinks
+		self.batch_size = batch_size
+		self.queue = queue.Queue(maxsize=depth)
+		self.stop = threading.Event()
+		self.thread = threading.Thread(target=self._run, daemon=True)
+		self.thread.start()
+	def _put(self, item):
+		while not self.stop.is_set():
+			try:
+				self.queue.put(item, timeout=0.1)
+				return True
+			except queue.Full:
+				pass
+		return False
+	def _run(self):
+		batch = []
+		try:
+			for item in walkSorted(self.root, self.follow_symlinks):
+				batch.append(item)
+				if len(batch) >= self.batch_size:
+					if not self._put(batch):
+						return
+					batch = []
+			if batch:
+				self._put(batch)
+		except Exception as e:
+			self._put(e)
+		self._put(None)
+	def __iter__(self):
+		while True:
+			batch = self.queue.get()
+			if batch is None:
+				return
+			if isinstance(batch, Exception):
+				raise batch
+			yield from batch
+	def close(self):
+		self.stop.set()
+
+def compareTrees(left, right, parallel=True, follow_symlinks=False, tolerance_ns=0):
+	# streams a freshness comparison of two directory trees as treeEntry tuples, ordered by path.
+	# status is 'Newer'/'Older'/'Same' (left vs right mtime) or 'OnlyLeft'/'OnlyRight'.
+	# Each side is walked once in sorted order (on its own thread when parallel=True) and merged.
+	if parallel:
+		readers = [_treeReader(left, follow_symlinks), _treeReader(right, follow_symlinks)]
+		left_it, right_it = iter(readers[0]), iter(readers[1])
+	else:
+		readers = []
+		left_it, right_it = walkSorted(left, follow_symlinks), walkSorted(right, follow_symlinks)
+	try:
+		l = next(left_it, None)
+		r = next(right_it, None)
+		while l is not None or r is not None:
+			if r is None or (l is not None and l[0] < r[0]):
+				yield treeEntry(os.path.join(*l[0]), 'OnlyLeft', l[1], None)
+				l = next(left_it, None)
+			elif l is None or r[0] < l[0]:
+				yield treeEntry(os.path.join(*r[0]), 'OnlyRight', None, r[1])
+				r = next(right_it, None)
+			else:
+				status = _compareNs(l[1].st_mtime_ns, r[1].st_mtime_ns, tolerance_ns)
+				yield treeEntry(os.path.join(*l[0]), status, l[1], r[1])
+				l = next(left_it, None)
+				r = next(right_it, None)
+	finally:
+		for reader in readers:
+			reader.close()
+
+class testTrees():
+	def __init__(self, left=None, right=None, parallel=True, follow_symlinks=False, tolerance_ns=0):
+		self.left = left
+		self.right = right
+		self.parallel = parallel
+		self.follow_symlinks = follow_symlinks
+		self.tolerance_ns = tolerance_ns
+	def __iter__(self):
+		return compareTrees(self.left, self.right, parallel=self.parallel, follow_symlinks=self.follow_symlinks, tolerance_ns=self.tolerance_ns)
+	def compare(self):
+		# lists of relative paths by status. Holds every path, use iter() on huge trees.
+		out = {'Newer': [], 'Older': [], 'Same': [], 'OnlyLeft': [], 'OnlyRight': []}
+		for entry in self:
+			out[entry.status].append(entry.path)
+		return out
+	def counts(self):
+		out = {'Newer': 0, 'Older': 0, 'Same': 0, 'OnlyLeft': 0, 'OnlyRight': 0}
+		for entry in self:
+			out[entry.status] += 1
+		return out
+
+HASH_CHUNK = 1048576
+MMAP_THRESHOLD = 67108864# files at least this big are hashed through mmap instead of readinto()
+
+def hashFile(filepath, algorithm='sha256', chunk_size=HASH_CHUNK):
+	# streams the file through hashlib in fixed-size chunks, never holding more than one chunk.
+	h = hashlib.new(algorithm)
+	with open(filepath, 'rb') as f:
+		size = os.fstat(f.fileno()).st_size
+		if size >= MMAP_THRESHOLD:
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+				with memoryview(mm) as view:
+					for offset in range(0, size, chunk_size):
+						h.update(view[offset:offset + chunk_size])
+		else:
+			buf = bytearray(chunk_size)
+			with memoryview(buf) as view:
+				while True:
+					n = f.readinto(buf)
+					if not n:
+						break
+					h.update(view[:n])
+	return h.hexdigest()
+
+class hashCache():
+	# on-disk digest cache keyed by (st_dev, st_ino, size, mtime_ns, algorithm), so unchanged files are never re-read.
+	def __init__(self, dbfile=None, commit_every=1000):
+		if dbfile is None:
+			dbfile = os.path.join(os.path.expanduser("~"), 'filehash_cache.db')
+		self.dbfile = dbfile
+		self.commit_every = commit_every
+		self._conn = None
+		self._pending = 0
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+	def _connect(self):
+		if self._conn is None:
+			self._conn = sqlite3.connect(self.dbfile, check_same_thread=False)
+			self._conn.execute("CREATE TABLE IF NOT EXISTS hashes (dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, algorithm TEXT, digest TEXT, PRIMARY KEY (dev, ino, algorithm));")
+			atexit.register(self.close)
+		return self._conn
+	def lookup(self, st, algorithm='sha256'):
+		with self._lock:
+			row = self._connect().execute("SELECT digest FROM hashes WHERE dev=? AND ino=? AND algorithm=? AND size=? AND mtime_ns=?;", (st.st_dev, st.st_ino, algorithm, st.st_size, st.st_mtime_ns)).fetchone()
+			if row is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			return row[0]
+	def store(self, st, digest, algorithm='sha256'):
+		with self._lock:
+			self._connect().execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?);", (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, algorithm, digest))
+			self._pending += 1
+			if self._pending >= self.commit_every:
+				self._conn.commit()
+				self._pending = 0
+	def flush(self):
+		with self._lock:
+			if self._conn is not None:
+				self._conn.commit()
+				self._pending = 0
+	def close(self):
+		with self._lock:
+			if self._conn is not None:
+				self._conn.commit()
+				self._conn.close()
+				self._conn = None
+				self._pending = 0
+	def info(self):
+		return {'hits': self.hits, 'misses': self.misses, 'dbfile': self.dbfile}
+
+HASH_CACHE = hashCache()
+
+def fileHash(filepath, algorithm='sha256', cache=True):
+	# digest of filepath's contents, served from HASH_CACHE while inode, size and mtime are unchanged.
+	if cache is True:
+		cache = HASH_CACHE
+	st = os.stat(filepath)
+	if cache:
+		digest = cache.lookup(st, algorithm)
+		if digest is not None:
+			return digest
+	digest = hashFile(filepath, algorithm)
+	if cache and _sameFile(st, os.stat(filepath)):# don't cache a file that changed while being read
+		cache.store(st, digest, algorithm)
+	return digest
+
+def _hashOrNone(filepath, algorithm, cache):
+	try:
+		return fileHash(filepath, algorithm, cache)
+	except (FileNotFoundError, PermissionError, IsADirectoryError):
+		return None
+
+def hashFiles(paths, threads=8, algorithm='sha256', cache=True):
+	# {path: digest} for a batch of files hashed on a thread pool (hashlib releases the GIL). Unreadable files map to None.
+	paths = list(paths)
+	if threads is None or threads <= 1:
+		out = {path: _hashOrNone(path, algorithm, cache) for path in paths}
+	else:
+		with ThreadPoolExecutor(max_workers=threads) as pool:
+			out = dict(zip(paths, pool.map(lambda path: _hashOrNone(path, algorithm, cache), paths)))
+	if cache is True:
+		HASH_CACHE.flush()
+	elif cache:
+		cache.flush()
+	return out
+
+def sameContent(file1, file2, algorithm='sha256', cache=True):
+	if os.stat(file1).st_size != os.stat(file2).st_size:
+		return False
+	return fileHash(file1, algorithm, cache) == fileHash(file2, algorithm, cache)
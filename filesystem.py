@@ -4,6 +4,7 @@ import subprocess
 import shutil
 from helper_utils.log import *
 from helper_utils.filestats import *
+from helper_utils.sh import lines
 logger = logger(verbose=True)
 log = logger.log_msg
 
@@ -18,6 +19,17 @@ class filesystem():
 	def fileStats(self, filepath):
 		return fileStats(filepath)
 
+	@logger.timed('filesystem.bulkStats')
+	def bulkStats(self, paths=None, threads=None, follow_symlinks=False):
+		if paths is None:
+			paths = self.cwd
+		return bulkStats(paths, threads=threads, follow_symlinks=follow_symlinks)
+
+	@logger.timed('filesystem.hashFiles')
+	def hashFiles(self, paths, threads=8, algorithm='sha256'):
+		return hashFiles(paths, threads=threads, algorithm=algorithm)
+
+	@logger.timed('filesystem.copy')
 	def copy(self, src_path, dest_path, overwrite=None):
 		if overwrite is None:
 			overwrite = self.overwrite
@@ -58,6 +70,7 @@ class filesystem():
 			ok = True
 		if ok:
 			shutil.copytree(src_path, dest_path)
+			invalidateStats(dest_path, recursive=True)
 			return
 			
 
@@ -73,6 +86,7 @@ class filesystem():
 			ok = True
 		if ok:
 			shutil.copy2(src_path, dest_path)
+			invalidateStats(dest_path)
 
 	def _rm_dir(self, path, force=False):
 		is_empty = False
@@ -86,12 +100,13 @@ class filesystem():
 		is_dir = os.path.isdir(path)
 		if exists and is_dir and is_empty:
 			os.rmdir(path)
+			invalidateStats(path)
 			log(f"filesystem._rm_dir():Removed directory: {path}!", 'info')
 		elif is_dir and not is_empty and not force:
 			txt = f"filesystem._rm_dir():Error - Directory not empty! (path='{path}') - Using subprocess..."
 			log(txt, 'error')
 			try:
-				subprocess.call(f"rm -rf \"{path}\"")
+				subprocess.call(["rm", "-rf", path])
 			except Exception as e:
 				txt = f"{txt} - {e}"
 				raise Exception(txt)
@@ -102,7 +117,9 @@ class filesystem():
 				log(f"filesystem._rm_dir():Removing file - {filepath}", 'info')
 				self._rm_file(filepath)
 			os.rmdir(path)
+			invalidateStats(path, recursive=True)
 
+	@logger.timed('filesystem.snd')
 	def snd(self, path, pattern):# Search and destroy files by pattern
 		if type(pattern) != list:
 			patterns = [pattern]
@@ -124,16 +141,19 @@ class filesystem():
 	def _rm_file(self, path):
 		if os.path.exists(path):
 			os.remove(path)
+			invalidateStats(path)
 			log(f"filesystem._rm_file():Removed file - '{path}'!", 'info')
 		else:
 			raise FileNotFoundError(txt)
 
+	@logger.timed('filesystem.rm')
 	def rm(self, path, force=False):
 		if os.path.isdir(path):
 			self._rm_dir(path, force=force)
 		else:
 			self._rm_file(path)
 
+	@logger.timed('filesystem.ls')
 	def ls(self, path):
 		if not os.path.exists(path):
 			txt = f"filesystem.ls():Error - path doesn't exist! ({path})"
@@ -184,6 +204,7 @@ class filesystem():
 			ok = True
 		log(f"filesystem.copy():Moved '{src_path}' to '{dest_path}'!", 'info')
 
+	@logger.timed('filesystem.mv')
 	def mv(self, src_path, dest_path):
 		exists = os.path.exists(src_path)
 		if not exists:
@@ -204,6 +225,7 @@ class filesystem():
 			data = ''
 			f.write(data)
 			f.close()
+		invalidateStats(filepath)
 
 	def write(self, data, filepath, force=False):
 		go = False
@@ -221,6 +243,7 @@ class filesystem():
 				with open(filepath, 'w') as f:
 					f.write(data)
 					f.close()
+				invalidateStats(filepath)
 				return True
 			except Exception as e:
 				txt = f"filesystem.write():Error - {e}"
@@ -230,23 +253,24 @@ class filesystem():
 			log(txt, 'error')
 			return False
 
+	@logger.timed('filesystem.find')
 	def find(self, path=None, pattern="*.*"):
+		try:
+			return list(self.find_iter(path, pattern))
+		except Exception as e:
+			txt = f"filesystem.find():Error - {e}"
+			log(txt, 'error')
+			return []
+
+	def find_iter(self, path=None, pattern="*.*"):# yields matches as 'find' prints them, raises on errors
 		if path is None:
 			path = self.cwd
 		if type(pattern) != list:
 			patterns = [pattern]
 		else:
 			patterns = pattern
-		l = []
 		for pattern in patterns:
-			try:
-				items = subprocess.check_output(f"find \"{path}\" -name \"{pattern}\"", shell=True).decode().strip().splitlines()
-				l += items
-			except Exception as e:
-				txt = f"filesystem.find():Error - {e}"
-				log(txt, 'error')
-				return []
-		return l
+			yield from lines(["find", path, "-name", pattern])
 
 	def cat(self, filepath=None):
 		data = ''
@@ -3,9 +3,11 @@
 import git_actions
 import pickle
 from helper_utils.filesystem import filesystem
-from helper_utils.log import logger
+from helper_utils.log import logger, timed
+from helper_utils.sh import lines
 from pathlib import Path
 import subprocess
+import shutil
 import pexpect
 import time
 import getpass
@@ -35,9 +37,8 @@ os.environ['GCM_PLAINTEXT_STORE_PATH'] = token_store_file
 def set_gitdir():
 	base_dir = os.getcwd()
 	path = None
-	com = f"find \"$(pwd)\" -name \"*.git\""
 	try:
-		path = subprocess.check_output(com, shell=True).decode().strip().splitlines()
+		path = subprocess.check_output(["find", base_dir, "-name", "*.git"]).decode().strip().splitlines()
 		if len(path) > 1:
 			for p in path:
 				idx = path.index(p)
@@ -98,7 +99,7 @@ def get_repositories(user='darthmonkey2004'):
 	return data
 
 def get_actions():
-	actions = [item for item in dir(git_actions) if '_' not in item and 'sh' not in item]
+	actions = [item for item in dir(git_actions) if '_' not in item and 'sh' not in item and callable(getattr(git_actions, item))]# skips imported modules
 	return actions
 
 class git_mgr():
@@ -186,8 +187,8 @@ class git_mgr():
 				#raise Exception(Exception, msg)
 			else:
 				self.add_local_repo()
-		for a in get_actions():
-			self.__dict__[a] = git_actions.__dict__[a]
+		for a in get_actions():# shadows git_mgr's own clone/status/pull/merge, so the copies are timed here
+			self.__dict__[a] = timed(f"git_mgr.{a}")(git_actions.__dict__[a])
 
 
 	def add_local_repo(self, path=None, token=None):
@@ -218,23 +219,23 @@ class git_mgr():
 			self.path = path
 		os.chdir(self.path)
 		self.name = os.path.basename(self.path)
-		ret, self.email = self.sh("git config --global --get user.email")
+		ret, self.email = self.sh(["git", "config", "--global", "--get", "user.email"])
 		self.user = self.email.split('@')[0]
 		self.url = f"https://github.com/{self.user}/{self.name}.git"
 		print("url:", self.url)
-		ret, msg = self.sh("git init")
+		ret, msg = self.sh(["git", "init"])
 		print(ret, msg)
-		ret, msg = self.sh("git symbolic-ref HEAD refs/heads/main")
+		ret, msg = self.sh(["git", "symbolic-ref", "HEAD", "refs/heads/main"])
 		print(ret, msg)
-		ret, msg = self.sh("git add .")
+		ret, msg = self.sh(["git", "add", "."])
 		print(ret, msg)
-		ret, msg = self.sh("git commit -m \"test commit\"")
+		ret, msg = self.sh(["git", "commit", "-m", "test commit"])
 		print(ret, msg)
-		ret, msg = self.sh(f"git remote add origin {self.url}")
+		ret, msg = self.sh(["git", "remote", "add", "origin", self.url])
 		print(ret, msg)
-		ret, msg = self.sh(f"git remote -v")
+		ret, msg = self.sh(["git", "remote", "-v"])
 		print(ret, msg)
-		ret, msg = self.sh(f"git config --local user.email={self.email}")
+		ret, msg = self.sh(["git", "config", "--local", f"user.email={self.email}"])
 		print(ret, msg)
 		return self.path
 
@@ -284,7 +285,7 @@ class git_mgr():
 		else:
 			go = True
 		if go:
-			ret, msg = self.sh(f"git branch -d {branch}")
+			ret, msg = self.sh(["git", "branch", "-d", branch])
 			if ret:
 				print(f"Successfully deleted branch: {branch}!")
 				return True
@@ -377,7 +378,7 @@ class git_mgr():
 			return self.save_settings(settings_file=settings_file)
 			
 	def get_current_branch(self):
-		ret, msg = self.sh("git branch --show-current")
+		ret, msg = self.sh(["git", "branch", "--show-current"])
 		if not ret:
 			print(f"Error getting current branch: {ret}")
 			return ret
@@ -388,7 +389,7 @@ class git_mgr():
 	def get_merge_sources(self, branch=None):
 		if branch is not None:
 			self.set_branch(branch=branch)
-		ret, data = self.sh("git ls-remote")
+		ret, data = self.sh(["git", "ls-remote"])
 		if ret:
 			heads = []
 			pulls = []
@@ -417,7 +418,7 @@ class git_mgr():
 		return self.merge_sources
 
 	def create_branch(self, branch):
-		ret, msg = self.sh(f"git branch {branch}")
+		ret, msg = self.sh(["git", "branch", branch])
 		if ret:
 			ret, msg = self.set_branch(branch=branch)
 		return ret, msg
@@ -442,7 +443,7 @@ class git_mgr():
 			else:
 				print(f"Error creating branch!")
 		else:#if create not needed...
-			ret, msg = self.sh(f"git checkout {branch}")#switch to branch
+			ret, msg = self.sh(["git", "checkout", branch])#switch to branch
 			if ret:
 				pass
 			else:
@@ -450,7 +451,7 @@ class git_mgr():
 		return self.branch
 
 	def pull_branch(self, branch):
-		ret, msg  = self.sh(f"git pull origin {branch}")
+		ret, msg  = self.sh(["git", "pull", "origin", branch])
 		if not ret:
 			print("Error getting existing branch {branch}: {msg}")
 			return ret
@@ -459,7 +460,7 @@ class git_mgr():
 
 
 	def create_new_fromBranch(self, new_branch, src_branch):
-		ret, msg = self.sh(f"git checkout -b {new_branch} {src_branch}")
+		ret, msg = self.sh(["git", "checkout", "-b", new_branch, src_branch])
 		if not ret:
 			print(f"Error creating branch {new_branch} from {src_branch}: {msg}")
 			return ret
@@ -478,41 +479,41 @@ class git_mgr():
 	def get_commit_history(self, branch=None, return_last=False):
 		if branch is None:
 			branch = self.branch
-		ret, data = self.sh('git log')
-		if not ret:
-			print("Error getting commit history -", ret)
-			return {}
-		data = data.splitlines()
+		git_log = lines(["git", "log"])# streamed, commits are parsed as git prints them
 		out = {}
 		desc = None
-		for line in data:
-			if "commit " in line and "commit message" not in line:
-				new = True
-				sha = line.split("commit ")[1]
-				out[sha] = {}
-				d = out[sha]
-				d['sha'] = sha
-			else:
-				new = False
-			if "commit message" in line:
-				d['commit_message'] = line.split("commit message ")[1]
-			elif "Merge: " in line:
-				d['merge'] = line.split("Merge: ")[1]
-			elif "Author: " in line:
-				d['author'] = line.split('Author: ')[1]
-			elif "Date: " in line:
-				d['date'] = line.split('Date:')[1].strip()
-			else:
-				if line != '':
-					if not new:
-						desc.append(line.strip())
-					elif new:
-						if desc is None:
-							desc = []
-							d['description'] = None
-						else:
-							d['description'] = ". ".join(desc)
-							desc = []
+		try:
+			for line in git_log:
+				if "commit " in line and "commit message" not in line:
+					new = True
+					sha = line.split("commit ")[1]
+					out[sha] = {}
+					d = out[sha]
+					d['sha'] = sha
+				else:
+					new = False
+				if "commit message" in line:
+					d['commit_message'] = line.split("commit message ")[1]
+				elif "Merge: " in line:
+					d['merge'] = line.split("Merge: ")[1]
+				elif "Author: " in line:
+					d['author'] = line.split('Author: ')[1]
+				elif "Date: " in line:
+					d['date'] = line.split('Date:')[1].strip()
+				else:
+					if line != '':
+						if not new:
+							desc.append(line.strip())
+						elif new:
+							if desc is None:
+								desc = []
+								d['description'] = None
+							else:
+								d['description'] = ". ".join(desc)
+								desc = []
+		except (subprocess.CalledProcessError, OSError) as e:
+			print("Error getting commit history -", e)
+			return {}
 		for sha in out.keys():
 			d = out[sha]['description']
 			if d == '':
@@ -530,9 +531,9 @@ class git_mgr():
 		if un:
 			self._commit(f"Merging {merge_from} to {merge_to}.")
 		self.set_branch(merge_to)
-		ret, msg = self.sh(f"git merge {merge_from}")
+		ret, msg = self.sh(["git", "merge", merge_from])
 		if ret:
-			ret, msg = self.sh(f"git push --set-upstream origin {branch}")
+			ret, msg = self.sh(["git", "push", "--set-upstream", "origin", branch])
 			if not ret:
 				print("Error pushing to remote repo - {ret}")
 				return False
@@ -559,7 +560,7 @@ class git_mgr():
 
 	def merge_main_to_branch(self, target_branch):
 		self.set_branch(branch=target_branch)
-		ret, msg = self.sh("git merge main")
+		ret, msg = self.sh(["git", "merge", "main"])
 		if not ret:
 			print("Error merging main into branch {target_branch}: {ret}")
 			return ret
@@ -573,7 +574,7 @@ class git_mgr():
 		return self.repositories
 
 	def get_remote_branches(self):
-		ret, remotes = self.sh(f"git branch --remotes")
+		ret, remotes = self.sh(["git", "branch", "--remotes"])
 		if ret:
 			remotes = remotes.splitlines()
 			l = []
@@ -590,8 +591,8 @@ class git_mgr():
 			self._install_git()
 
 	def _test_git(self):
-		hasgit = subprocess.check_output("which git", shell=True).decode().strip()
-		if hasgit == '':
+		hasgit = shutil.which("git")
+		if hasgit is None:
 			print("Git not installed! Installing...")
 			return False
 		else:
@@ -599,9 +600,8 @@ class git_mgr():
 
 
 	def _install_git(self):
-		com = f"sudo apt-get install -y git-all"
 		try:
-			subprocess.check_output(com, shell=True)
+			subprocess.check_output(["sudo", "apt-get", "install", "-y", "git-all"])
 			return True
 		except Exception as e:
 			print("Error installing git:", e)
@@ -629,17 +629,19 @@ class git_mgr():
 				pass
 		else:
 			raise Exception(Exception, f"Path already exists! ({self.path})")
-		com = f"cd \"{self.path}\"; echo \"# python_git\" >> README.md; git init; git add README.md"
-		ret = subprocess.check_output(com, shell=True).decode().strip()
+		with open(os.path.join(self.path, 'README.md'), 'a') as f:
+			f.write("# python_git\n")
+		ret = subprocess.check_output(["git", "init"], cwd=self.path).decode().strip()
+		ret += subprocess.check_output(["git", "add", "README.md"], cwd=self.path).decode().strip()
 		print(ret)
 		if self.email is None:
 			self.email = self.set_email()
 			self.user = self.set_user()
 		self.url = f"https://github.com/{self.email}/{self.name}.git"
 		self._commit("First commit!")
-		com = f"cd \"{self.path}\"; git branch -M main; git remote add origin https://github.com/{self.email.split('@')[0]}/{self.name}.git"
 		try:
-			ret = subprocess.check_output(com, shell=True).decode().strip()
+			ret = subprocess.check_output(["git", "branch", "-M", "main"], cwd=self.path).decode().strip()
+			ret += subprocess.check_output(["git", "remote", "add", "origin", f"https://github.com/{self.email.split('@')[0]}/{self.name}.git"], cwd=self.path).decode().strip()
 			if 'src refspec master does not match any' not in ret:
 				skip = False
 			else:
@@ -659,8 +661,7 @@ class git_mgr():
 		if not skip:
 			if self.branch == 'main':
 				print("WARNING: Updating main branch! Highly suggested to create a new branch (self.set_branch)...")
-			com = f"cd \"{self.path}\"; git push -u origin {self.branch}"
-			ret = subprocess.check_output(com, shell=True).decode().strip()
+			ret = subprocess.check_output(["git", "push", "-u", "origin", self.branch], cwd=self.path).decode().strip()
 			if ret != '':
 				print(ret)
 			if 'src refspec master does not match any' in ret:
@@ -669,6 +670,7 @@ class git_mgr():
 		self.get_repo_info()
 		return self.path
 
+	@timed('git_mgr.clone')
 	def clone(self, repo_url=None):
 		if repo_url is not None:
 			self.url = repo_url
@@ -680,7 +682,7 @@ class git_mgr():
 			self.path = os.path.join(os.getcwd(), repo_name)
 			createin = os.getcwd()
 		os.chdir(createin)
-		ret = subprocess.check_output(f"cd \"{self.path}\"; git clone \"{self.url}\"", shell=True).decode().strip()
+		ret = subprocess.check_output(["git", "clone", self.url], cwd=createin).decode().strip()
 		os.chdir(self.path)
 		self.get_repo_info()
 		return self.path
@@ -689,13 +691,12 @@ class git_mgr():
 		if path is not None:
 			self.path = path
 			os.chdir(self.path)
-		ret = subprocess.check_output(f"git init", shell=True).decode().strip()
+		ret = subprocess.check_output(["git", "init"]).decode().strip()
 		self.get_repo_info()
 
 
 	def _set_config_plaintext(self):
-		com = f"git config --local credential.credentialStore plaintext"
-		ret = subprocess.check_output(com, shell=True).decode().strip()
+		ret = subprocess.check_output(["git", "config", "--local", "credential.credentialStore", "plaintext"]).decode().strip()
 		if ret != '':
 			print("Error configuring local repository credential storage:", ret)
 			return False
@@ -705,9 +706,8 @@ class git_mgr():
 	def get_repo_info(self, path=None):
 		if path is None:
 			path = self.path
-		com = f"cd \"{path}\"; git config --local -l"
 		try:
-			items = subprocess.check_output(com, shell=True).decode().strip().splitlines()
+			items = subprocess.check_output(["git", "config", "--local", "-l"], cwd=path).decode().strip().splitlines()
 			for item in items:
 				if 'repositoryformatversion' in item:
 					self.repo_fmt_version = int(item.split('=')[1])
@@ -764,8 +764,7 @@ class git_mgr():
 		if self.store_type != 'local' and self.store_type != 'global':
 			msg = f"Bad store type ({self.store_type})! Valid options are 'local' and 'global'"
 			return False, msg
-		com = f"cd \"{self.path}\"; git config --{self.store_type} {key} \"{val}\""
-		ret = subprocess.check_output(com, shell=True).decode()
+		ret = subprocess.check_output(["git", "config", f"--{self.store_type}", key, val], cwd=self.path).decode()
 		if ret == '':
 			ret = True
 		else:
@@ -834,19 +833,17 @@ class git_mgr():
 
 	def _status(self):
 		self.get_repo_info()
-		com = f"cd \"{self.path}\"; git status"
-		return self.sh(com)
+		return self.sh(["git", "status"], cwd=self.path)
 
 
+	@timed('git_mgr.status')
 	def status(self, update=None):
 		if update is not None:
 			self.UPDATE = update
 		if self.UPDATE:
-			com = f"cd \"{self.path}\"; git fetch origin"
-			ret, data = self.sh(com)
-		com = f"cd \"{self.path}\"; git status"
+			ret, data = self.sh(["git", "fetch", "origin"], cwd=self.path)
 		self.get_repo_info()
-		ret, data = self.sh(com)
+		ret, data = self.sh(["git", "status"], cwd=self.path)
 		for line in data.splitlines():
 			if 'On branch ' in line:
 				self.branch = self.get_current_branch()
@@ -883,12 +880,17 @@ class git_mgr():
 		else:
 			return True, None
 
-	def sh(self, com):
-		if 'git' not in com and 'gh' not in com:# restrict shell commands to contain the 'git' command in string.
+	@timed('git_mgr.sh')
+	def sh(self, com, cwd=None):# com: argv list (exec'd directly) or string (through /bin/sh)
+		if isinstance(com, str):
+			valid = 'git' in com or 'gh' in com# restrict shell commands to contain the 'git' command in string.
+		else:
+			valid = len(com) > 0 and os.path.basename(com[0]) in ('git', 'gh')
+		if not valid:
 			txt = f"Error - invalid git string: {com}"
 			raise Exception(txt)
 		try:
-			ret = subprocess.check_output(com, shell=True).decode().strip()
+			ret = subprocess.check_output(com, shell=isinstance(com, str), cwd=cwd).decode().strip()
 			if ret == '':
 				ret = None
 			return True, ret
@@ -908,8 +910,7 @@ class git_mgr():
 			self.token = token
 		keyring.set_password(service_name="git_token", username=self.email, password=self.token)
 		fname = os.path.join(os.path.expanduser("~"), 'git_token.txt')
-		com = f"cd \"{self.path}\"; git config --local credential.credentialStore plaintext"
-		ret = subprocess.check_output(com, shell=True).decode().strip()
+		ret = subprocess.check_output(["git", "config", "--local", "credential.credentialStore", "plaintext"], cwd=self.path).decode().strip()
 		if ret != '':
 			print("Error storing token:", ret)
 			return False
@@ -926,12 +927,13 @@ class git_mgr():
 			raise Exception(txt)
 		return self.token
 
+	@timed('git_mgr._commit')
 	def _commit(self, commit_message=None):
 		if commit_message is None:
 			commit_message = "Default commit message (generated by git.commit(commit_message=None))."
-		com = f"cd \"{self.path}\"; git add .; git commit -m \"{commit_message}\""
 		try:
-			ret = subprocess.check_output(com, shell=True).decode().strip()
+			subprocess.check_output(["git", "add", "."], cwd=self.path)
+			ret = subprocess.check_output(["git", "commit", "-m", commit_message], cwd=self.path).decode().strip()
 			print(ret)
 			return True
 		except Exception as e:
@@ -940,9 +942,9 @@ class git_mgr():
 			return False
 
 
+	@timed('git_mgr._add')
 	def _add(self):
-		com = f"cd \"{self.path}\"; git add ."
-		ret = subprocess.check_output(com, shell=True).decode().strip()
+		ret = subprocess.check_output(["git", "add", "."], cwd=self.path).decode().strip()
 		if ret == '':
 			return True
 		else:
@@ -950,6 +952,7 @@ class git_mgr():
 			return False
 
 
+	@timed('git_mgr._push')
 	def _push(self, token=None, email=None, force=False):
 		if token is not None:
 			self.token = token
@@ -971,7 +974,7 @@ class git_mgr():
 
 	def _browse_create_repo(self):
 		url = "https://github.com/new"
-		ret = subprocess.check_output(f"xdg-open \"{url}\"", shell=True).decode().strip()
+		ret = subprocess.check_output(["xdg-open", url]).decode().strip()
 		if ret != '':
 			print("Error openin browser:", ret)
 
@@ -993,13 +996,12 @@ class git_mgr():
 	def _rm_token_file(self, fname=None):
 		if fname is not None:
 			self.token_store_file = fname
-		com = f"rm \"{self.token_store_file}\""
-		ret = subprocess.check_output(com, shell=True).decode().strip()
-		if ret != '':
-			print("Error removing token file:", ret)
-			return False
-		else:
+		try:
+			os.remove(self.token_store_file)
 			return True
+		except OSError as e:
+			print("Error removing token file:", e)
+			return False
 	
 
 	def list_commands(self, command='all'):
@@ -1026,6 +1028,7 @@ class git_mgr():
 		return True
 
 
+	@timed('git_mgr.push')
 	def push(self, commit_message=None, force=False):
 		self.rm_junk_files()
 		if not self._write_token_file():
@@ -1047,8 +1050,9 @@ class git_mgr():
 		return True
 
 
+	@timed('git_mgr.pull')
 	def pull(self):
-		return subprocess.check_output(f"git pull", shell=True).decode().strip()
+		return subprocess.check_output(["git", "pull"]).decode().strip()
 
 if __name__ == "__main__":
 	url = None
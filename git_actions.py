@@ -1,6 +1,10 @@
+import os
+import subprocess
 from helper_utils import sh
+from helper_utils.sh import lines as sh_lines, _output as _sh_output
 
-sh = sh.shell().sh
+_shell = sh.shell()
+sh = _shell.sh
 
 """revisions:
 diff: Show changes between commits, commit and working tree, etc
@@ -11,71 +15,63 @@ status: Show the working tree status
 """
 
 def fetch():
-	return sh("git fetch")
+	return sh(["git", "fetch"])
 
 def pull():
-	return sh("git pull")
+	return sh(["git", "pull"])
 
 def push():
-	return sh("git push")
+	return sh(["git", "push"])
 
 def init(path):
-	return sh(f"cd \"{path}\"; git init")
+	return sh(["git", "init"], cwd=path)
 
 def add(files=[]):
 	if files == []:
-		files = '.'
-	else:
-		files = ",".join(files)
-	com = f"git add \"{files}\""
-	return sh(com)
+		files = ['.']
+	return sh(["git", "add", *files])
 
 def mv(src, dest):
-	com = f"git mv \"{src}\" \"{dest}\""
-	return sh(com)
+	return sh(["git", "mv", src, dest])
 
 def rm(files=[]):
 	if files == []:
-		files = '.'
-	else:
-		files = ",".join(files)
-	com = f"git rm \"{files}\""
-	return sh(com)
+		files = ['.']
+	return sh(["git", "rm", *files])
 
 def restore(files=[]):
 	if files == []:
-		files = '.'
-	else:
-		files = ",".join(files)
-	com = f"git restore \"{files}\""
-	return sh(com)
+		files = ['.']
+	return sh(["git", "restore", *files])
 
 def clone(repo_url, repopath=None):
 	if repopath is None:
 		repopath = os.getcwd()
 	dirname = os.path.basename(repopath)
 	path = os.path.dirname(repopath)
-	com = f"cd \"{path}\"; git clone \"{repo_url}\""
-	ret = sh(com)
+	ret = sh(["git", "clone", repo_url], cwd=path)
 	if os.path.exists(repopath):
 		return True
 	else:
 		return False
 
 def log():
-	return sh("git log")
+	return sh(["git", "log"])
+
+def log_lines():# streams 'git log' line by line instead of buffering it
+	return sh_lines(["git", "log"])
 
 def show():
-	return sh("git show")
+	return sh(["git", "show"])
 
 def merge():
-	return sh("git merge")
+	return sh(["git", "merge"])
 
 def commit(message='default commit mesage'):
-	return sh(f"git commit -m \"{message}\"")
+	return sh(["git", "commit", "-m", message])
 
 def rebase():
-	ret = sh("git rebase")
+	ret = sh(["git", "rebase"])
 	if 'error: cannot rebase:' in ret:
 		print(f"Error - {ret}")
 		return False
@@ -83,50 +79,153 @@ def rebase():
 		return True
 
 def addTag(tag_name):
-	return sh(f"git tag \"{tag_name}\"")
+	return sh(["git", "tag", tag_name])
 
 def listTags():
-	return sh(f"git tag -l")
+	return sh(["git", "tag", "-l"])
 
 def rmTag(tag_name):
-	return sh(f"git tag -d \"{tag_name}\"")
+	return sh(["git", "tag", "-d", tag_name])
 
 def newFile(filepath, branch_name='edits'):
 	newBranch(branch_name)
 
 def reset():
-	return sh("git reset")
+	return sh(["git", "reset"])
 
 def getBranch():
-	return sh("git branch")
+	return sh(["git", "branch"])
 
 def newBranch(branch_name):
-	return sh(f"git checkout -b \"{branch_name}\"")
+	return sh(["git", "checkout", "-b", branch_name])
 
 def checkout(branch_name):
-	return sh(f"git checkout \"{branch_name}\"")
+	return sh(["git", "checkout", branch_name])
 
 def switch(branch_name):
-	return sh(f"git switch \"{branch_name}\"")
+	return sh(["git", "switch", branch_name])
 
 def commit(message='Default commit message.'):
-	return sh(f"git commit -a -m \"{message}\"")
+	return sh(["git", "commit", "-a", "-m", message])
 
 def bisect(action):
 	actions = ['help', 'start', 'bad', 'good', 'new', 'old', 'terms', 'skip', 'next', 'reset', 'visualize', 'view', 'replay', 'log', 'run']
 	print("TODO - bisect: Use binary search to find the commit that introduced a bug")
 
 def diff():
-	return sh("git diff")
+	return sh(["git", "diff"])
 
 def grep(query):
-	return sh(f"git grep \"{query}\"")
+	return sh(["git", "grep", query])
 
 def log():
-	return sh("git log")
+	return sh(["git", "log"])
 
 def show():
-	return sh("git show")
+	return sh(["git", "show"])
 
 def status():
-	return sh("git status")
+	return sh(["git", "status"])
+
+
+"""async variants (async_<action>): same commands and results as the functions above, but awaitable, with a 'cwd'
+argument so one event loop can drive many repositories at once, e.g.
+	await asyncio.gather(*(async_status(cwd=repo) for repo in repos))
+Like sh(), they return a string (a list for multi-line output) and raise CalledProcessError on failure."""
+
+async def async_git(*args, cwd=None, timeout=None):
+	result = await _shell.run(["git", *args], cwd=cwd, timeout=timeout, check=True)
+	return _sh_output(result.stdout)
+
+async def async_fetch(cwd=None):
+	return await async_git("fetch", cwd=cwd)
+
+async def async_pull(cwd=None):
+	return await async_git("pull", cwd=cwd)
+
+async def async_push(cwd=None):
+	return await async_git("push", cwd=cwd)
+
+async def async_init(path):
+	return await async_git("init", cwd=path)
+
+async def async_add(files=[], cwd=None):
+	if files == []:
+		files = ['.']
+	return await async_git("add", *files, cwd=cwd)
+
+async def async_mv(src, dest, cwd=None):
+	return await async_git("mv", src, dest, cwd=cwd)
+
+async def async_rm(files=[], cwd=None):
+	if files == []:
+		files = ['.']
+	return await async_git("rm", *files, cwd=cwd)
+
+async def async_restore(files=[], cwd=None):
+	if files == []:
+		files = ['.']
+	return await async_git("restore", *files, cwd=cwd)
+
+async def async_clone(repo_url, repopath=None):
+	if repopath is None:
+		repopath = os.getcwd()
+	await async_git("clone", repo_url, cwd=os.path.dirname(repopath))
+	return os.path.exists(repopath)
+
+async def async_log(cwd=None):
+	return await async_git("log", cwd=cwd)
+
+async def async_log_lines(cwd=None):# async generator, streams 'git log' line by line
+	async for line in _shell.stream(["git", "log"], cwd=cwd):
+		yield line
+
+async def async_show(cwd=None):
+	return await async_git("show", cwd=cwd)
+
+async def async_merge(cwd=None):
+	return await async_git("merge", cwd=cwd)
+
+async def async_commit(message='Default commit message.', cwd=None):
+	return await async_git("commit", "-a", "-m", message, cwd=cwd)
+
+async def async_rebase(cwd=None):
+	try:
+		await async_git("rebase", cwd=cwd)
+		return True
+	except subprocess.CalledProcessError as e:
+		print(f"Error - {e.stderr or e}")
+		return False
+
+async def async_addTag(tag_name, cwd=None):
+	return await async_git("tag", tag_name, cwd=cwd)
+
+async def async_listTags(cwd=None):
+	return await async_git("tag", "-l", cwd=cwd)
+
+async def async_rmTag(tag_name, cwd=None):
+	return await async_git("tag", "-d", tag_name, cwd=cwd)
+
+async def async_reset(cwd=None):
+	return await async_git("reset", cwd=cwd)
+
+async def async_getBranch(cwd=None):
+	return await async_git("branch", cwd=cwd)
+
+async def async_newBranch(branch_name, cwd=None):
+	return await async_git("checkout", "-b", branch_name, cwd=cwd)
+
+async def async_checkout(branch_name, cwd=None):
+	return await async_git("checkout", branch_name, cwd=cwd)
+
+async def async_switch(branch_name, cwd=None):
+	return await async_git("switch", branch_name, cwd=cwd)
+
+async def async_diff(cwd=None):
+	return await async_git("diff", cwd=cwd)
+
+async def async_grep(query, cwd=None):
+	return await async_git("grep", query, cwd=cwd)
+
+async def async_status(cwd=None):
+	return await async_git("status", cwd=cwd)
@@ -1,29 +1,795 @@
 import traceback, sys
 import logging
 import datetime
+import functools
+import math
 import os
+import atexit
+import tempfile
+from multiprocessing.connection import Listener, Client
+import gzip
+import heapq
+import itertools
+import json
+import queue
+import shutil
+import threading
+import time
 
 
 """configurable logger class, for use where I keep needing one... (REUSABLE)"""
 
+
+def _format_line(created, lvl, msg):
+	"""Formats one record as a logfile line: '<iso timestamp> <LEVEL>:<message>'."""
+
+	ts = datetime.datetime.fromtimestamp(created).isoformat(sep=' ', timespec='microseconds')
+	return f"{ts} {logging.getLevelName(lvl)}:{msg}\n"
+
+
+def _format_json(created, lvl, msg, origin):
+	"""Formats one record as a JSON line with timestamp, level, module, function, line and message fields."""
+
+	ts = datetime.datetime.fromtimestamp(created).isoformat(sep=' ', timespec='microseconds')
+	module, function, line = origin if origin is not None else (None, None, None)
+	return json.dumps({'ts': ts, 'level': logging.getLevelName(lvl), 'module': module, 'function': function, 'line': line, 'msg': msg}) + "\n"
+
+
+_ORIGINS = {}# code object -> (module, function), so origin capture is a dict lookup after the first call
+
+
+def _origin(depth=2):
+	"""Returns (module, function, line) of the frame 'depth' levels above this call.
+	Uses sys._getframe() and caches per code object instead of going through traceback/inspect."""
+
+	frame = sys._getframe(depth)
+	code = frame.f_code
+	try:
+		module, function = _ORIGINS[code]
+	except KeyError:
+		module, function = _ORIGINS[code] = (frame.f_globals.get('__name__'), code.co_name)
+	return module, function, frame.f_lineno
+
+
+class _fileSink():
+	"""Appends formatted lines to a logfile. Used instead of the root 'logging' handler by the async writer and rotation modes.
+
+	Writes are buffered and flushed every 'flush_interval' seconds by a daemon thread (None flushes on every write).
+	If max_bytes is set, the file is rotated once it grows past it: logfile -> logfile.1 -> ... -> logfile.<backup_count>,
+	with rotated segments gzipped ('logfile.1.gz') on a background thread when compress=True."""
+
+	def __init__(self, logfile, max_bytes=None, backup_count=5, compress=True, flush_interval=None, buffer_size=65536, json_lines=False):
+		self.logfile = logfile
+		self.json_lines = json_lines
+		self.max_bytes = max_bytes
+		self.backup_count = backup_count
+		self.compress = compress
+		self.flush_interval = flush_interval
+		self.buffer_size = buffer_size
+		logdir = os.path.dirname(self.logfile)
+		if logdir != '':
+			os.makedirs(logdir, exist_ok=True)
+		self._lock = threading.RLock()
+		self._compressor = None
+		self._open()
+		self._stop = threading.Event()
+		if flush_interval:
+			self._flusher = threading.Thread(target=self._flush_loop, name='logger-flush', daemon=True)
+			self._flusher.start()
+		atexit.register(self.close)
+
+	def _open(self):
+		self.fp = open(self.logfile, 'a', buffering=self.buffer_size)
+		self.size = self.fp.tell()
+
+	def format(self, created, lvl, msg, origin=None):
+		if self.json_lines:
+			return _format_json(created, lvl, msg, origin)
+		return _format_line(created, lvl, msg)
+
+	def _flush_loop(self):
+		while not self._stop.wait(self.flush_interval):
+			self.flush()
+
+	def write(self, lines):
+		data = ''.join(lines)
+		with self._lock:
+			if self.fp.closed:# records logged after close() are still appended
+				self._open()
+			self.fp.write(data)
+			self.size += len(data)# characters, close enough to bytes for a size threshold
+			if self.max_bytes is not None and self.size >= self.max_bytes:
+				self.rotate()
+			elif not self.flush_interval:
+				self.fp.flush()
+
+	def flush(self):
+		with self._lock:
+			if not self.fp.closed:
+				self.fp.flush()
+
+	def _segment(self, idx):
+		if self.compress:
+			return f"{self.logfile}.{idx}.gz"
+		return f"{self.logfile}.{idx}"
+
+	def rotate(self):
+		"""Closes the logfile, shifts older segments up by one and starts a fresh logfile."""
+
+		with self._lock:
+			self.fp.close()
+			if self._compressor is not None:# segment .1 must be finished before it is shifted
+				self._compressor.join()
+				self._compressor = None
+			if self.backup_count > 0:
+				for idx in range(self.backup_count - 1, 0, -1):
+					if os.path.exists(self._segment(idx)):
+						os.replace(self._segment(idx), self._segment(idx + 1))
+				os.replace(self.logfile, f"{self.logfile}.1")
+				if self.compress:
+					self._compressor = threading.Thread(target=self._gzip, args=(f"{self.logfile}.1",), name='logger-gzip')
+					self._compressor.start()
+			else:
+				os.remove(self.logfile)
+			self._open()
+
+	def _gzip(self, path):
+		try:
+			with open(path, 'rb') as src, gzip.open(f"{path}.gz.tmp", 'wb') as dest:
+				shutil.copyfileobj(src, dest, 1048576)
+			os.replace(f"{path}.gz.tmp", f"{path}.gz")
+			os.remove(path)
+		except Exception as e:
+			sys.stderr.write(f"log._fileSink():Error compressing rotated log '{path}' - {e}\n")
+
+	def close(self):
+		self._stop.set()
+		with self._lock:
+			if not self.fp.closed:
+				self.fp.close()
+			compressor, self._compressor = self._compressor, None
+		if compressor is not None:
+			compressor.join()
+
+
+class _collectorClient():
+	"""Sink used by logger(collector=address): ships (created, level, message, origin) records to a logCollector
+	over a local socket instead of writing the logfile. Records are sent in batches of 'batch_size', or every
+	'flush_interval' seconds by a daemon thread. If the collector can't be reached, batches are appended to
+	'fallback_logfile' directly so nothing is lost. The connection is re-opened after a fork."""
+
+	def __init__(self, address, authkey=None, flush_interval=1.0, batch_size=512, fallback_logfile=None, json_lines=False):
+		self.address = address
+		self.authkey = authkey
+		self.flush_interval = flush_interval
+		self.batch_size = batch_size
+		self.fallback_logfile = fallback_logfile
+		self.json_lines = json_lines
+		self._fallback = None
+		self._start()
+		atexit.register(self.close)
+
+	def _start(self):
+		self.pid = os.getpid()
+		self.conn = None
+		self.buffer = []
+		self._lock = threading.RLock()
+		self._stop = threading.Event()
+		if self.flush_interval:
+			threading.Thread(target=self._flush_loop, name='logger-collector-flush', daemon=True).start()
+
+	def _flush_loop(self):
+		while not self._stop.wait(self.flush_interval):
+			self.flush()
+
+	def format(self, created, lvl, msg, origin=None):
+		return (created, lvl, msg, origin)
+
+	def write(self, records):
+		if self.pid != os.getpid():# forked: the parent's socket and unsent buffer aren't ours
+			self._start()
+		with self._lock:
+			self.buffer.extend(records)
+			if len(self.buffer) >= self.batch_size or not self.flush_interval:
+				self._send()
+
+	def _send(self):
+		if not self.buffer:
+			return
+		batch, self.buffer = self.buffer, []
+		try:
+			if self.conn is None:
+				self.conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+			self.conn.send(batch)
+		except Exception as e:
+			self.conn = None
+			if self._fallback is None:
+				sys.stderr.write(f"log._collectorClient():Collector unavailable at '{self.address}' ({e}), writing to '{self.fallback_logfile}'\n")
+				self._fallback = _fileSink(self.fallback_logfile, json_lines=self.json_lines)
+			self._fallback.write([self._fallback.format(*record) for record in batch])
+
+	def flush(self):
+		with self._lock:
+			if self.pid == os.getpid():
+				self._send()
+
+	def close(self):
+		self._stop.set()
+		with self._lock:
+			if self.pid != os.getpid():
+				return
+			self._send()
+			if self.conn is not None:
+				self.conn.close()
+				self.conn = None
+			if self._fallback is not None:
+				self._fallback.close()
+
+
+class logCollector():
+	"""Single owner of a logfile shared by several processes.
+
+	Workers use logger(collector=collector.address) and send record batches over an AF_UNIX socket.
+	Each connection gets a reader thread, and everything is funnelled through one _asyncWriter/_fileSink,
+	so lines are never interleaved and rotation/JSON options apply as for a local logger.
+	Workers send their buffers every flush_interval, so batches from different workers overlap in time: records are held
+	for 'reorder_window' seconds and written in timestamp order (None writes them as they arrive). A record arriving
+	later than that after it was logged is written as soon as it arrives.
+	Run it in-process (start()/stop(), or as a context manager) or as a dedicated process with serve_forever()."""
+
+	def __init__(self, logfile=None, address=None, authkey=None, max_bytes=None, backup_count=5, compress=True, flush_interval=1.0, json_lines=False, queue_size=100000, reorder_window=1.0):
+		if logfile is None:
+			logfile = os.path.join(os.path.expanduser("~"), 'log.txt')
+		if address is None:
+			address = os.path.join(tempfile.gettempdir(), f"helper_utils_log_{os.getpid()}.sock")
+		self.logfile = logfile
+		self.address = address
+		self.authkey = authkey
+		self.sink = _fileSink(logfile, max_bytes=max_bytes, backup_count=backup_count, compress=compress, flush_interval=flush_interval, json_lines=json_lines)
+		self.writer = _asyncWriter(self.sink, queue_size=queue_size, overflow='block')
+		self.listener = None
+		self.received = 0
+		self._readers = []
+		self._stopping = False
+		self._lock = threading.Lock()
+		self.reorder_window = reorder_window
+		self._pending = []# heap of (created, seq, record) waiting out the reorder window
+		self._seq = itertools.count()
+		self._draining = False# set by stop(): from then on records go straight to the writer
+		self._release_stop = threading.Event()
+		self._releaser = None
+
+	def start(self):
+		self.listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+		threading.Thread(target=self._accept_loop, name='logger-collector', daemon=True).start()
+		if self.reorder_window:
+			self._releaser = threading.Thread(target=self._release_loop, name='logger-collector-release', daemon=True)
+			self._releaser.start()
+		return self
+
+	def _accept_loop(self):
+		while not self._stopping:
+			try:
+				conn = self.listener.accept()
+			except Exception:# failed handshake/auth, or listener closed
+				continue
+			if self._stopping:
+				conn.close()
+				return
+			reader = threading.Thread(target=self._read_loop, args=(conn,), name='logger-collector-reader', daemon=True)
+			reader.start()
+			self._readers.append(reader)
+
+	def _read_loop(self, conn):
+		while True:
+			try:
+				batch = conn.recv()
+			except (EOFError, OSError):
+				break
+			records = [(created, lvl, msg, None, origin) for created, lvl, msg, origin in batch]
+			with self._lock:
+				self.received += len(batch)
+				if self.reorder_window and not self._draining:
+					for record in records:
+						heapq.heappush(self._pending, (record[0], next(self._seq), record))
+					records = ()
+			for record in records:
+				self.writer.put(record)
+		conn.close()
+
+	def _release_loop(self):
+		while not self._release_stop.wait(0.1):
+			self._release(time.time() - self.reorder_window)
+
+	def _release(self, cutoff, final=False):
+		"""Helper function, hands held records logged at or before 'cutoff' to the writer, oldest first."""
+
+		with self._lock:
+			self._draining = self._draining or final
+			ready = []
+			while self._pending and self._pending[0][0] <= cutoff:
+				ready.append(heapq.heappop(self._pending)[2])
+		for record in ready:
+			self.writer.put(record)
+
+	def serve_forever(self):
+		self.start()
+		try:
+			while True:
+				time.sleep(3600)
+		except KeyboardInterrupt:
+			pass
+		finally:
+			self.stop()
+
+	def stop(self, timeout=5.0):
+		"""Stops accepting, waits up to 'timeout' seconds for connected workers to disconnect, then flushes the logfile."""
+
+		if self.listener is not None:
+			self._stopping = True
+			try:
+				Client(self.address, family='AF_UNIX', authkey=self.authkey).close()# wakes the blocked accept()
+			except Exception:
+				pass
+			self.listener.close()
+			self.listener = None
+		deadline = time.monotonic() + timeout
+		for reader in self._readers:
+			reader.join(max(0, deadline - time.monotonic()))
+		self._release_stop.set()
+		if self._releaser is not None:
+			self._releaser.join()
+		self._release(math.inf, final=True)
+		self.writer.close()
+		self.sink.close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, exc_type, exc, tb):
+		self.stop()
+		return False
+
+
+class _asyncWriter():
+	"""Background writer thread for logger(async_mode=True).
+
+	Callers only enqueue (created, level, file message, console text, origin) records.
+	The thread drains the queue in batches, writing one chunk to the logfile and one to the console per batch.
+	overflow='block' makes callers wait when the queue is full, overflow='drop' discards (and counts) the record.
+	Queued records are flushed by close(), which is registered with atexit. Records put once close() has started
+	are written (and flushed) by the calling thread, as the writer thread may already be gone."""
+
+	def __init__(self, sink, queue_size=10000, overflow='block', batch_size=512):
+		if overflow not in ('block', 'drop'):
+			raise ValueError(f"Invalid overflow policy: {overflow} (use 'block' or 'drop')")
+		self.sink = sink
+		self.overflow = overflow
+		self.batch_size = batch_size
+		self.queue = queue.Queue(maxsize=queue_size)
+		self.dropped = 0
+		self._lock = threading.Lock()
+		self._closing = False# set (under _lock) before the stop sentinel is queued
+		self._closed = False# set once the writer thread has exited
+		self.thread = threading.Thread(target=self._run, name='logger-writer', daemon=True)
+		self.thread.start()
+		atexit.register(self.close)
+
+	def put(self, record):
+		if self._closing:
+			self._write([record])
+			self.sink.flush()# the sink's flusher may be stopped already
+			return
+		if self.overflow == 'drop':
+			try:
+				self.queue.put_nowait(record)
+			except queue.Full:
+				with self._lock:
+					self.dropped += 1
+		else:
+			self.queue.put(record)
+		if self._closed:# raced with close(): queued behind the sentinel after the final drain
+			self._drain()
+
+	def _drain(self):
+		"""Helper function, writes whatever is left in the queue once the writer thread has exited."""
+
+		batch = []
+		while True:
+			try:
+				record = self.queue.get_nowait()
+			except queue.Empty:
+				break
+			self.queue.task_done()
+			if record is not None:
+				batch.append(record)
+		self._write(batch)# also reports records dropped since the last batch
+		self.sink.flush()
+
+	def _write(self, batch):
+		lines = []
+		console = []
+		with self._lock:
+			dropped, self.dropped = self.dropped, 0
+		if dropped:
+			lines.append(self.sink.format(time.time(), logging.WARNING, f"log._asyncWriter():{dropped} records dropped (queue full)"))
+		for created, lvl, msg, text, origin in batch:
+			if msg is not None:
+				lines.append(self.sink.format(created, lvl, msg, origin))
+			if text is not None:
+				console.append(f"{text}\n")
+		if lines:
+			self.sink.write(lines)
+		if console:
+			sys.stdout.write(''.join(console))
+			sys.stdout.flush()
+
+	def _run(self):
+		while True:
+			batch = [self.queue.get()]
+			while len(batch) < self.batch_size:
+				try:
+					batch.append(self.queue.get_nowait())
+				except queue.Empty:
+					break
+			stop = None in batch
+			try:
+				self._write([record for record in batch if record is not None])
+			except Exception as e:
+				sys.stderr.write(f"log._asyncWriter():Error writing log batch - {e}\n")
+			for record in batch:
+				self.queue.task_done()
+			if stop:
+				return
+
+	def flush(self):
+		"""Blocks until every record queued so far has been written."""
+
+		if not self._closed:
+			self.queue.join()
+
+	def close(self):
+		with self._lock:
+			if self._closing:
+				return
+			self._closing = True
+		self.queue.put(None)
+		self.thread.join()
+		self._closed = True
+		self._drain()
+
+
+class _siteLimiter():
+	"""Per call-site sampling and rate limiting for logger (levels below ERROR only).
+
+	sample_every=N emits only every Nth message from a call site, rate_limit=N emits at most N messages per
+	call site per 'interval' seconds (applied after sampling). Suppressed messages are counted exactly, and
+	summaries() turns the pending counts into 'N similar messages suppressed' lines."""
+
+	def __init__(self, rate_limit=None, interval=1.0, sample_every=None):
+		self.rate_limit = rate_limit
+		self.interval = interval
+		self.sample_every = sample_every
+		self.sites = {}# (code, lineno) -> site dict
+		self._lock = threading.Lock()
+		self._last_summary = time.monotonic()
+
+	def allow(self, frame, lvl, msg, args):
+		"""Returns True if this message should be emitted, otherwise counts it against its call site."""
+
+		key = (frame.f_code, frame.f_lineno)
+		now = time.monotonic()
+		with self._lock:
+			site = self.sites.get(key)
+			if site is None:
+				site = self.sites[key] = {'origin': (frame.f_globals.get('__name__'), frame.f_code.co_name, frame.f_lineno), 'window': now, 'window_count': 0, 'seen': 0, 'emitted': 0, 'suppressed': 0, 'pending': 0, 'level': lvl, 'last': None}
+			site['seen'] += 1
+			ok = True
+			if self.sample_every and (site['seen'] - 1) % self.sample_every:
+				ok = False
+			elif self.rate_limit is not None:
+				if now - site['window'] >= self.interval:
+					site['window'] = now
+					site['window_count'] = 0
+				if site['window_count'] >= self.rate_limit:
+					ok = False
+				else:
+					site['window_count'] += 1
+			if ok:
+				site['emitted'] += 1
+			else:
+				site['suppressed'] += 1
+				site['pending'] += 1
+				site['level'] = lvl
+				site['last'] = (msg, args)
+			return ok
+
+	def summaries(self, force=False):
+		"""Returns (level, summary message, origin) for every call site with pending suppressed messages,
+		if 'interval' seconds have passed since the last summaries (or force=True), and resets the pending counts."""
+
+		now = time.monotonic()
+		out = []
+		with self._lock:
+			if not force and now - self._last_summary < self.interval:
+				return out
+			self._last_summary = now
+			for site in self.sites.values():
+				if site['pending']:
+					out.append((site['level'], site['pending'], site['last'], site['origin']))
+					site['pending'] = 0
+		return out
+
+	def stats(self):
+		"""Cumulative per call-site counts: {'module.function:line': {'seen', 'emitted', 'suppressed'}}."""
+
+		with self._lock:
+			return {f"{site['origin'][0]}.{site['origin'][1]}:{site['origin'][2]}": {'seen': site['seen'], 'emitted': site['emitted'], 'suppressed': site['suppressed']} for site in self.sites.values()}
+
+
+class _histogram():
+	"""Log-scale latency histogram in nanoseconds.
+	count/total/max are exact, percentiles are accurate to one bucket (~4.4%, 16 buckets per doubling)."""
+
+	__slots__ = ('count', 'total', 'max', 'buckets')
+	LOG_BASE = math.log(2) / 16
+
+	def __init__(self):
+		self.count = 0
+		self.total = 0
+		self.max = 0
+		self.buckets = {}
+
+	def add(self, ns):
+		self.count += 1
+		self.total += ns
+		if ns > self.max:
+			self.max = ns
+		idx = int(math.log(ns) / self.LOG_BASE) if ns > 0 else 0
+		self.buckets[idx] = self.buckets.get(idx, 0) + 1
+
+	def percentile(self, pct):
+		target = pct / 100 * self.count
+		seen = 0
+		for idx in sorted(self.buckets):
+			seen += self.buckets[idx]
+			if seen >= target:
+				return min(math.exp((idx + 0.5) * self.LOG_BASE), self.max)
+		return self.max
+
+	def summary(self):
+		ms = 1000000
+		return {'count': self.count, 'total_ms': self.total / ms, 'mean_ms': self.total / self.count / ms, 'p50_ms': self.percentile(50) / ms, 'p95_ms': self.percentile(95) / ms, 'p99_ms': self.percentile(99) / ms, 'max_ms': self.max / ms}
+
+
+class _timerRegistry():
+	"""Process-wide per-operation latency histograms, filled by timed()/logger.timed()."""
+
+	def __init__(self):
+		self.histograms = {}
+		self._lock = threading.Lock()
+		self._last_summary = time.monotonic()
+
+	def summary_due(self, interval):
+		"""True at most once per 'interval' seconds process-wide, so loggers sharing these histograms don't each
+		log the same summary on their own timers."""
+
+		now = time.monotonic()
+		with self._lock:
+			if now - self._last_summary < interval:
+				return False
+			self._last_summary = now
+			return True
+
+	def record(self, name, ns):
+		with self._lock:
+			hist = self.histograms.get(name)
+			if hist is None:
+				hist = self.histograms[name] = _histogram()
+			hist.add(ns)
+
+	def snapshot(self, reset=False):
+		with self._lock:
+			out = {name: hist.summary() for name, hist in self.histograms.items()}
+			if reset:
+				self.histograms = {}
+		return out
+
+
+_TIMINGS = _timerRegistry()
+
+
+class _timed():
+	"""Context manager and decorator recording the duration of a block/call under 'name' in _TIMINGS.
+	If a logger is attached, it gets a chance to log periodic summaries when the block ends."""
+
+	__slots__ = ('name', 'logger', 'start')
+
+	def __init__(self, name, logger=None):
+		self.name = name
+		self.logger = logger
+		self.start = None
+
+	def __enter__(self):
+		self.start = time.perf_counter_ns()
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		_TIMINGS.record(self.name, time.perf_counter_ns() - self.start)
+		if self.logger is not None:
+			self.logger._timing_summary()
+		return False
+
+	def __call__(self, func):
+		name, logger = self.name, self.logger
+
+		@functools.wraps(func)
+		def wrapper(*args, **kwargs):
+			with _timed(name, logger):
+				return func(*args, **kwargs)
+		return wrapper
+
+
+def timed(name):
+	"""Times a block ('with timed("op"):') or function ('@timed("op")') into the process-wide histograms."""
+
+	return _timed(name)
+
+
+def timing_snapshot(reset=False):
+	"""Returns {operation: {count, total_ms, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} for everything timed so far."""
+
+	return _TIMINGS.snapshot(reset=reset)
+
+
+_LEVELS = {}# level name/int -> int, filled by logger.convert_lvl_to_int()
+for _name in ('debug', 'info', 'warning', 'error', 'critical'):
+	_LEVELS[_name] = _LEVELS[_name.upper()] = _LEVELS[getattr(logging, _name.upper())] = getattr(logging, _name.upper())
+
+
 class logger():
 	"""Main logger class."""
-	def __init__(self, logfile=None, default_log_level='info', verbose=False):
+	def __init__(self, logfile=None, default_log_level='info', verbose=False, async_mode=False, queue_size=10000, overflow='block', max_bytes=None, backup_count=5, compress=True, flush_interval=1.0, json_lines=False, rate_limit=None, rate_interval=1.0, sample_every=None, timing_interval=60.0, collector=None, authkey=None):
 		"""Initializes logger class.
 		
 		Sets log filepath and creating directory if needed.
 		If the logfile is provided, sets as class attribute, otherwise is set as None.
 		Default logfile is in user's home directory as 'log.txt'.
 		Set current default log_level with self.set_default_log_level(), or by log_level class attribute.
-		Temporary logging levels can be set in log_msg(log_level=1/2/3...)"""
+		Temporary logging levels can be set in log_msg(log_level=1/2/3...)
+		async_mode=True hands records to a background writer thread (see _asyncWriter), which appends
+		timestamped lines to the logfile itself. queue_size bounds the queue and overflow ('block'/'drop')
+		decides what happens when it is full.
+		max_bytes enables size-based rotation (see _fileSink): backup_count segments are kept, gzipped if compress=True.
+		Whenever the logger writes the logfile itself (async or rotation), writes are buffered and flushed every
+		flush_interval seconds (None flushes every write).
+		json_lines=True writes one JSON object per record (ts, level, module, function, line, msg), with the
+		calling module/function/line captured cheaply from the caller's frame (see _origin()).
+		rate_limit/rate_interval/sample_every limit repeated messages per call site (see _siteLimiter); suppressed
+		messages are summarized every rate_interval seconds and on flush()/close().
+		timing_interval: seconds between latency summaries logged for blocks wrapped with timed() (None disables).
+		collector: address of a logCollector owning the logfile (see logCollector); records are shipped there
+		in batches instead of being written locally. Rotation and format options then belong to the collector."""
 
 		if logfile is None:
 			self.logfile = os.path.join(os.path.expanduser("~"), 'log.txt')
 		else:
 			self.logfile = logfile
+		self._sink = None
+		self._writer = None
+		self.json_lines = json_lines
+		self._want_origin = json_lines or collector is not None
+		if collector is not None:
+			self._sink = _collectorClient(collector, authkey=authkey, flush_interval=flush_interval, fallback_logfile=self.logfile, json_lines=json_lines)
+		elif async_mode or max_bytes is not None or json_lines:
+			self._sink = _fileSink(self.logfile, max_bytes=max_bytes, backup_count=backup_count, compress=compress, flush_interval=flush_interval, json_lines=json_lines)
+		if async_mode:
+			self._writer = _asyncWriter(self._sink, queue_size=queue_size, overflow=overflow)
 		self.log_level = self.set_default_log_level(default_log_level)
 		#logging.basicConfig(filename=self.logfile, level=self.log_level)
 		self.verbose = verbose
+		self._limiter = None
+		self.set_rate_limit(rate_limit=rate_limit, interval=rate_interval, sample_every=sample_every)
+		self.timing_interval = timing_interval
+
+	def timed(self, name):
+		"""Context manager/decorator timing an operation into the process-wide latency histograms.
+		Usage: 'with logger.timed("tar.extract"):' or '@logger.timed("sql.query")'.
+		Summaries of all timings are logged every timing_interval seconds."""
+
+		return _timed(name, self)
+
+	def timing_snapshot(self, reset=False):
+		"""Returns per-operation latency stats as a dict (see timing_snapshot())."""
+
+		return _TIMINGS.snapshot(reset=reset)
+
+	def _timing_summary(self, force=False):
+		"""Helper function, writes one info line per timed operation to the logfile once timing_interval has passed
+		(process-wide, see _timerRegistry.summary_due()). Written straight to the file, whatever 'verbose' says."""
+
+		if self.timing_interval is None and not force:
+			return
+		if not force and not _TIMINGS.summary_due(self.timing_interval):
+			return
+		if 20 < self._level_int:
+			return
+		for name, stats in sorted(_TIMINGS.snapshot().items()):
+			self._emit(20, f"log.timed():{name} count={stats['count']} p50={stats['p50_ms']:.3f}ms p95={stats['p95_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms max={stats['max_ms']:.3f}ms", None)
+
+	def set_rate_limit(self, rate_limit=None, interval=1.0, sample_every=None):
+		"""Sets per call-site limits for messages below ERROR: at most 'rate_limit' messages per 'interval' seconds
+		and/or only every 'sample_every'th message. All None disables limiting (pending summaries are emitted first)."""
+
+		if self._limiter is not None:
+			self._summarize(force=True)
+		if rate_limit is None and sample_every is None:
+			self._limiter = None
+		else:
+			self._limiter = _siteLimiter(rate_limit=rate_limit, interval=interval, sample_every=sample_every)
+			atexit.register(self._summarize, True)
+
+	def suppression_stats(self):
+		"""Per call-site seen/emitted/suppressed counts, or {} if rate limiting is off."""
+
+		if self._limiter is None:
+			return {}
+		return self._limiter.stats()
+
+	def _summarize(self, force=False):
+		"""Helper function, emits 'N similar messages suppressed' lines for call sites with suppressed messages."""
+
+		limiter = self._limiter
+		if limiter is None:
+			return
+		for lvl, count, last, origin in limiter.summaries(force):
+			try:
+				sample = self._render(*last)
+			except Exception as e:
+				sample = f"<unformattable: {e}>"
+			msg = f"log.log_msg():{count} similar messages suppressed from {origin[0]}.{origin[1]}:{origin[2]} (last: {sample})"
+			self._dispatch(lvl, msg, origin if self._want_origin else None)
+
+	def flush(self):
+		"""Emits pending suppression summaries, waits for queued records to be written (async mode)
+		and flushes the logfile buffer."""
+
+		self._summarize(force=True)
+		if self._writer is not None:
+			self._writer.flush()
+		if self._sink is not None:
+			self._sink.flush()
+		else:
+			for handler in logging.getLogger().handlers:
+				handler.flush()
+
+	def close(self):
+		"""Flushes and stops the async writer and closes the logfile, if the logger owns them.
+		Later messages are still written (inline)."""
+
+		self._summarize(force=True)
+		if self._writer is not None:
+			self._writer.close()
+		if self._sink is not None:
+			self._sink.close()
+
+	def _emit(self, lvl, msg=None, text=None, origin=None):
+		"""Helper function, sends 'msg' to the logfile and 'text' to the console.
+		In async mode both are queued for the writer thread, otherwise they're written inline."""
+
+		if self._writer is not None:
+			if msg is not None and lvl < self._level_int:
+				msg = None
+			if msg is not None or text is not None:
+				self._writer.put((time.time(), lvl, msg, text, origin))
+			return
+		if self._sink is not None:
+			if msg is not None and lvl >= self._level_int:
+				self._sink.write([self._sink.format(time.time(), lvl, msg, origin)])
+		elif msg is not None:
+			logging.log(lvl, msg)
+		if text is not None:
+			print(text)
 
 	def set_verbose(self, verbose):
 		if type(verbose) != bool:
@@ -47,32 +813,71 @@ class logger():
 			f.close()
 
 	def _test_log_level(self, log_level):
-		if isinstance(log_level, str):
-			log_level = self.convert_lvl_to_int(log_level)
-		if not isinstance(log_level, int):
-			return False
-		return True
+		return self.convert_lvl_to_int(log_level) is not None
 
 	def set_default_log_level(self, log_level):
 		"""Function that for setting valid log_levels.
 		Accepts lowercase strings, uppercase strings, and integer arguments for log_level.
-		Sets basicConfig to use class attributes logfile and log_level."""
+		Sets basicConfig to use class attributes logfile and log_level (unless the logger writes the logfile itself).
+		The integer level is cached for the log_msg()/is_enabled() fast path."""
 
 		if self._test_log_level(log_level):
 			log_level_int = self.convert_lvl_to_int(log_level)
-			logging.basicConfig(filename=self.logfile, level=log_level_int)
+			if self._sink is None:
+				logging.basicConfig(filename=self.logfile, level=log_level_int)
+			self._level_int = log_level_int
 			return log_level
 		else:
 			raise ValueError(f"Invalid log level: {log_level}")
 
 	def convert_lvl_to_int(self, lvl):
-		return getattr(logging, lvl.upper(), None)
+		"""Returns the integer for a level name (any case) or integer level, None if invalid. Results are cached."""
+
+		try:
+			return _LEVELS[lvl]
+		except KeyError:
+			pass
+		except TypeError:# unhashable
+			return None
+		if isinstance(lvl, str):
+			val = getattr(logging, lvl.upper(), None)
+			if not isinstance(val, int):
+				return None
+		elif isinstance(lvl, int) and not isinstance(lvl, bool):
+			val = lvl
+		else:
+			return None
+		_LEVELS[lvl] = val
+		return val
+
+	def is_enabled(self, log_level):
+		"""Returns True if a message at log_level would be emitted (always True in verbose mode).
+		Use to guard expensive message construction: 'if logger.is_enabled("debug"): ...'"""
+
+		lvl = _LEVELS.get(log_level)
+		if lvl is None:
+			lvl = self.convert_lvl_to_int(log_level)
+			if lvl is None:
+				raise TypeError(f"Invalid log_level used: {log_level}!")
+		return self.verbose or lvl >= self._level_int
 
-	def log_msg(self, msg=None, log_level=None):
+	def _render(self, msg, args):
+		"""Helper function, builds the final message: calls 'msg' if callable, then applies %-style args."""
+
+		if callable(msg):
+			msg = msg()
+		if args:
+			msg = msg % args
+		return msg
+
+	def log_msg(self, msg=None, log_level=None, *args):
 		"""Main logger function for class.
 		Functionality:
 			- checks for no message data, raises error if None.
 			- Tests log_level, raises error if invalid (non-numeric)
+			- Returns before any formatting if the level is below the default level (see is_enabled())
+			- msg may be a %-style format string with the values passed after log_level, or a callable
+			  returning the message. Either is only formatted when the message is emitted.
 			- Allows override of current default (or provided log level) if 'self.verbose' is True
 			- Prints all messages if level is debug or verbose is set."""
 
@@ -80,24 +885,29 @@ class logger():
 		if msg is None:
 			raise ValueError(f"logger.log_msg():No message data provided!")
 		if log_level is None:
-			log_level = self.log_level
+			lvl = self._level_int
 		else:
-			if not self._test_log_level(log_level):
-				raise TypeError(f"Invalid log_level used: {log_level}!")
-		lvl = self.convert_lvl_to_int(log_level)
-		if self.verbose and lvl != 40:
-			# if verbose flag == True, override debug value and print all messages (unless error)
-			logging.debug("log.log_msg():Overriding log level (verbose=True)")
-			print(f"DEBUG(verbose=True)::{msg}")
-		elif not self.verbose:
-			if lvl == 10:#debug level
-				logging.debug(msg)
-				print(f"DEBUG::{msg}")
-			elif lvl == 20:
-				logging.info(msg)
-			elif lvl == 30:
-				logging.warning(msg)
-		elif lvl == 40:
+			lvl = _LEVELS.get(log_level)
+			if lvl is None:
+				lvl = self.convert_lvl_to_int(log_level)
+				if lvl is None:
+					raise TypeError(f"Invalid log_level used: {log_level}!")
+		if not self.verbose and lvl < self._level_int:
+			return
+		if self._limiter is not None and lvl < 40:
+			if not self._limiter.allow(sys._getframe(1), lvl, msg, args):
+				self._summarize()
+				return
+		msg = self._render(msg, args)
+		origin = _origin() if self._want_origin else None
+		self._dispatch(lvl, msg, origin)
+		if self._limiter is not None:
+			self._summarize()
+
+	def _dispatch(self, lvl, msg, origin=None):
+		"""Helper function, routes a rendered message by level/verbosity (traceback for errors, console for debug)."""
+
+		if lvl >= 40:
 			t = datetime.datetime.now()
 			ts = (str(t.day) + "-" + str(t.month) + "-" + str(t.year) + " " + str(t.hour) + ":" + str(t.minute) + ":" + str(t.second) + ":" + str(t.microsecond))
 			try:
@@ -105,9 +915,16 @@ class logger():
 				j = "\n"
 				tb_text = j.join(formatted_lines)
 				msg = (f"{ts}::{msg}\n{tb_text}")
-				print(f"ERROR:{msg}")
+				text = f"ERROR:{msg}"
 			except Exception as e:
 				print("tb_text", tb_text)
 				msg = (f"{ts}::{msg}\nUnable to insert traceback info({e})")
-			logging.error(msg)
-		
+				text = None
+			self._emit(lvl, msg, text, origin)
+		elif self.verbose:
+			# if verbose flag == True, override debug value and print all messages (unless error)
+			self._emit(10, "log.log_msg():Overriding log level (verbose=True)", f"DEBUG(verbose=True)::{msg}", origin)
+		elif lvl == 10:#debug level
+			self._emit(10, msg, f"DEBUG::{msg}", origin)
+		else:
+			self._emit(lvl, msg, None, origin)
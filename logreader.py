@@ -0,0 +1,358 @@
+import bisect
+import datetime
+import json
+import mmap
+import os
+import struct
+import time
+
+
+"""Reader for (large) helper_utils logfiles: tail, follow, and indexed time-range search.
+
+Time ranges need the timestamped files the logger writes itself (async/rotation/json_lines/collector modes):
+	'2024-05-01 04:57:58.123456 INFO:message'  or  '{"ts": "2024-05-01 04:57:58.123456", "level": "INFO", ...}'
+Lines without a leading timestamp (traceback lines) belong to the record above them.
+Range searches rely on records being in timestamp order, which holds for these files (logCollector reorders the
+workers' overlapping batches within its reorder_window).
+Files in the default logging format ('WARNING:root:message', the logger's basicConfig mode) carry no timestamps:
+tail/follow and level/contains searches work on them, a start/end raises ValueError."""
+
+
+_IDX_MAGIC = b'HULOGIX1'
+_IDX_HEADER = struct.Struct('<8sQQQQ')# magic, st_dev, st_ino, index_every, indexed bytes
+_IDX_ENTRY = struct.Struct('<dQ')# timestamp, byte offset of the record start
+_TS_LEN = 26# 'YYYY-MM-DD HH:MM:SS.ffffff'
+_JSON_PREFIX = b'{"ts": "'
+_LEVEL_NAMES = (b'DEBUG', b'INFO', b'WARNING', b'ERROR', b'CRITICAL')
+_SNIFF_BYTES = 65536# how far into the file to look for timestamps
+
+
+def _to_ts(value):
+	"""Helper function, accepts None, a float/int timestamp, a datetime or an ISO string and returns a float timestamp."""
+
+	if value is None or isinstance(value, (int, float)):
+		return value
+	if isinstance(value, datetime.datetime):
+		return value.timestamp()
+	return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def _to_key(ts):
+	"""Helper function, float timestamp -> the fixed-width bytes the logger writes, which sort like the timestamps."""
+
+	if ts is None:
+		return None
+	return datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S.%f').encode()
+
+
+def _line_key(line):
+	"""Returns the raw timestamp bytes of a record's first line (bytes), or None for continuation/unknown lines."""
+
+	if line.startswith(_JSON_PREFIX):
+		raw = line[len(_JSON_PREFIX):len(_JSON_PREFIX) + _TS_LEN]
+	else:
+		raw = line[:_TS_LEN]
+	if len(raw) != _TS_LEN or raw[4:5] != b'-' or raw[10:11] != b' ' or raw[13:14] != b':' or raw[19:20] != b'.':
+		return None
+	return raw
+
+
+def _plain_key(line):
+	"""Returns b'' if a line (bytes) starts a record in the default logging format ('LEVEL:logger:message'), else None."""
+
+	level = line.split(b':', 1)[0]
+	if level in _LEVEL_NAMES and len(level) < len(line):
+		return b''
+	return None
+
+
+def _line_ts(line):
+	"""Returns the timestamp of a record's first line (bytes), or None for continuation/unknown lines."""
+
+	raw = _line_key(line)
+	if raw is None:
+		return None
+	try:
+		return datetime.datetime.fromisoformat(raw.decode()).timestamp()
+	except ValueError:
+		return None
+
+
+def _record_level(record):
+	"""Returns the level name of a decoded record (text or JSON), or None."""
+
+	if record.startswith('{'):
+		try:
+			return json.loads(record.split('\n', 1)[0]).get('level')
+		except ValueError:
+			return None
+	if _line_key(record[:_TS_LEN].encode()) is not None:
+		head = record[_TS_LEN + 1:_TS_LEN + 12]
+	else:# default logging format: 'LEVEL:logger:message'
+		head = record[:12]
+	if ':' not in head:
+		return None
+	return head.split(':', 1)[0]
+
+
+class logReader():
+	"""Reads a logfile through mmap without loading it.
+
+	tail(n) returns the last n lines, follow() yields lines as they're appended (surviving rotation),
+	search(start, end, level, contains) streams matching records, using a sparse timestamp index stored beside the
+	logfile ('<logfile>.idx', one entry per 'index_every' bytes) to binary-search to the start of the range."""
+
+	def __init__(self, logfile=None, index_every=1048576):
+		if logfile is None:
+			logfile = os.path.join(os.path.expanduser("~"), 'log.txt')
+		self.logfile = logfile
+		self.index_file = f"{logfile}.idx"
+		self.index_every = index_every
+		self._index_ts = []
+		self._index_offsets = []
+		self._index_ident = None# (st_dev, st_ino) the in-memory index belongs to
+		self._indexed = 0
+
+	def _map(self):
+		"""Helper function, returns (file, mmap) of the logfile, or (None, None) if it's missing or empty."""
+
+		try:
+			f = open(self.logfile, 'rb')
+		except FileNotFoundError:
+			return None, None
+		if os.fstat(f.fileno()).st_size == 0:
+			f.close()
+			return None, None
+		return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def tail(self, n=10):
+		"""Returns the last n lines of the logfile, reading backwards from the end of the mapping."""
+
+		f, mm = self._map()
+		if mm is None:
+			return []
+		try:
+			end = len(mm)
+			if mm[end - 1:end] == b'\n':
+				end -= 1
+			pos = end
+			for i in range(n):
+				pos = mm.rfind(b'\n', 0, pos)
+				if pos == -1:
+					break
+			return mm[pos + 1:end].decode(errors='replace').split('\n')
+		finally:
+			mm.close()
+			f.close()
+
+	def follow(self, from_end=True, poll_interval=0.5):
+		"""Yields lines as they are appended to the logfile (like 'tail -f').
+		Reopens from the start when the logfile is rotated or truncated. Stop by closing the generator."""
+
+		f = None
+		ident = None
+		try:
+			while True:
+				if f is None:
+					try:
+						f = open(self.logfile, 'rb')
+					except FileNotFoundError:
+						time.sleep(poll_interval)
+						continue
+					st = os.fstat(f.fileno())
+					ident = (st.st_dev, st.st_ino)
+					if from_end:
+						f.seek(0, os.SEEK_END)
+					from_end = False
+				line = f.readline()
+				if line.endswith(b'\n'):
+					yield line[:-1].decode(errors='replace')
+					continue
+				if line:# partial line, wait for the rest
+					f.seek(-len(line), os.SEEK_CUR)
+				time.sleep(poll_interval)
+				try:
+					st = os.stat(self.logfile)
+				except FileNotFoundError:
+					continue
+				if (st.st_dev, st.st_ino) != ident or st.st_size < f.tell():
+					f.close()
+					f = None
+		finally:
+			if f is not None:
+				f.close()
+
+	def _load_index(self, st):
+		"""Helper function, loads '<logfile>.idx' if it belongs to this logfile. Returns the number of bytes covered."""
+
+		self._index_ts = []
+		self._index_offsets = []
+		try:
+			with open(self.index_file, 'rb') as f:
+				data = f.read()
+		except FileNotFoundError:
+			return 0
+		if len(data) < _IDX_HEADER.size:
+			return 0
+		magic, dev, ino, index_every, indexed = _IDX_HEADER.unpack_from(data)
+		if magic != _IDX_MAGIC or (dev, ino) != (st.st_dev, st.st_ino) or index_every != self.index_every or indexed > st.st_size:
+			return 0# different/rotated/truncated file: rebuild
+		for ts, offset in _IDX_ENTRY.iter_unpack(data[_IDX_HEADER.size:]):
+			self._index_ts.append(ts)
+			self._index_offsets.append(offset)
+		return indexed
+
+	def update_index(self):
+		"""Extends (or rebuilds) the sparse index up to the current end of the logfile and saves it.
+		Only a few bytes are read per 'index_every' chunk, so this stays cheap on multi-GB files.
+		If '<logfile>.idx' can't be written (read-only directory), the index is kept in memory only."""
+
+		f, mm = self._map()
+		if mm is None:
+			self._index_ts = []
+			self._index_offsets = []
+			self._index_ident = None
+			return 0
+		try:
+			st = os.fstat(f.fileno())
+			size = len(mm)
+			if self._index_ident == (st.st_dev, st.st_ino) and self._indexed <= size:
+				indexed = self._indexed
+			else:
+				indexed = self._load_index(st)
+			if indexed == size:
+				self._index_ident, self._indexed = (st.st_dev, st.st_ino), size
+				return len(self._index_ts)
+			pos = self._index_offsets[-1] + self.index_every if self._index_offsets else 0
+			while pos < size:
+				if pos > 0:# align to the start of a line
+					nl = mm.find(b'\n', pos - 1)
+					if nl == -1:
+						break
+					pos = nl + 1
+				found = None
+				while pos < size:# first timestamped record from here
+					nl = mm.find(b'\n', pos)
+					if nl == -1:# incomplete last line, picked up next time
+						break
+					ts = _line_ts(mm[pos:min(nl, pos + 64)])
+					if ts is not None:
+						found = (ts, pos)
+						break
+					pos = nl + 1
+				if found is None:
+					break
+				self._index_ts.append(found[0])
+				self._index_offsets.append(found[1])
+				pos = found[1] + self.index_every
+			self._index_ident, self._indexed = (st.st_dev, st.st_ino), size
+			tmp = f"{self.index_file}.tmp"
+			try:
+				with open(tmp, 'wb') as out:
+					out.write(_IDX_HEADER.pack(_IDX_MAGIC, st.st_dev, st.st_ino, self.index_every, size))
+					out.write(b''.join(_IDX_ENTRY.pack(ts, offset) for ts, offset in zip(self._index_ts, self._index_offsets)))
+				os.replace(tmp, self.index_file)
+			except OSError:
+				pass# unwritable directory: keep using the in-memory index
+			return len(self._index_ts)
+		finally:
+			mm.close()
+			f.close()
+
+	def _seek_offset(self, mm, start, start_key):
+		"""Helper function, byte offset to scan from for records at or after 'start': the sparse index narrows it to one
+		'index_every' chunk, which is then bisected in the mapping down to a few KB."""
+
+		if start is None:
+			return 0
+		idx = bisect.bisect_left(self._index_ts, start)
+		lo = self._index_offsets[idx - 1] if idx > 0 else 0
+		hi = self._index_offsets[idx] if idx < len(self._index_offsets) else len(mm)
+		while hi - lo > 4096:
+			mid = mm.find(b'\n', (lo + hi) // 2, hi)
+			key = None
+			while mid != -1 and mid + 1 < hi:# first timestamped line after mid
+				nl = mm.find(b'\n', mid + 1)
+				key = _line_key(mm[mid + 1:min(nl if nl != -1 else len(mm), mid + 65)])
+				if key is not None:
+					break
+				mid = nl
+			if key is None or mid == -1 or mid + 1 >= hi:
+				break
+			if key < start_key:
+				lo = mid + 1
+			else:
+				hi = mid + 1
+		return lo
+
+	def _timestamped(self, mm):
+		"""Helper function, True if a timestamped record starts within the first _SNIFF_BYTES of the mapping."""
+
+		pos = 0
+		stop = min(len(mm), _SNIFF_BYTES)
+		while pos < stop:
+			nl = mm.find(b'\n', pos, stop)
+			if _line_key(mm[pos:min(nl if nl != -1 else stop, pos + 64)]) is not None:
+				return True
+			if nl == -1:
+				break
+			pos = nl + 1
+		return False
+
+	def search(self, start=None, end=None, level=None, contains=None):
+		"""Yields records (str, traceback lines included) with start <= timestamp <= end, optionally only at
+		'level' (name, e.g. 'ERROR') and/or containing the substring 'contains'.
+		start/end may be datetimes, timestamps or ISO strings. The index is brought up to date first.
+		Logfiles without timestamps (default logging format) can only be filtered by level/contains: a start or end
+		raises ValueError."""
+
+		start, end = _to_ts(start), _to_ts(end)
+		start_key, end_key = _to_key(start), _to_key(end)
+		if level is not None:
+			level = level.upper()
+		needle = contains.encode() if contains is not None else None
+		f, mm = self._map()
+		if mm is None:
+			return
+		try:
+			size = len(mm)
+			if self._timestamped(mm):
+				line_key = _line_key
+				self.update_index()
+			elif start is not None or end is not None:
+				raise ValueError(f"logReader.search():{self.logfile} has no timestamped records, can't filter by start/end (only the logger's async/rotation/json_lines/collector modes write timestamps)")
+			else:
+				line_key = _plain_key
+			pos = self._seek_offset(mm, start, start_key)
+			record_start = None
+			while pos <= size:
+				nl = mm.find(b'\n', pos)
+				if nl == -1:
+					nl = size
+				key = line_key(mm[pos:min(nl, pos + 64)]) if pos < size else None
+				if key is not None or pos >= size:
+					if record_start is not None:
+						record = self._match(mm, record_start, pos, level, needle)
+						if record is not None:
+							yield record
+						record_start = None
+					if pos >= size:
+						break
+					if end_key is not None and key > end_key:
+						break
+					if start_key is None or key >= start_key:
+						record_start = pos
+				pos = nl + 1
+		finally:
+			mm.close()
+			f.close()
+
+	def _match(self, mm, begin, stop, level, needle):
+		"""Helper function, returns the decoded record mm[begin:stop] if it passes the level/substring filters."""
+
+		if needle is not None and mm.find(needle, begin, stop) == -1:
+			return None
+		record = mm[begin:stop].decode(errors='replace').rstrip('\n')
+		if level is not None and _record_level(record) != level:
+			return None
+		return record
@@ -1,5 +1,70 @@
+import asyncio
 import os
+import signal
 import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+_LINE_LIMIT = 1048576# longest line stream() accepts
+
+def _env(env):
+	if env is None:
+		return None
+	merged = dict(os.environ)
+	merged.update((key, str(val)) for key, val in env.items())
+	return merged
+
+def _kill(proc, group):# group: the child leads its own process group (string commands), kill all of it
+	try:
+		if group:
+			os.killpg(proc.pid, signal.SIGKILL)
+		else:
+			proc.kill()
+	except ProcessLookupError:
+		pass
+
+def _output(out):# sh()'s result: a string, or a list for multi-line output
+	if "\n" in out:
+		return out.splitlines()
+	return out
+
+# one finished command from shell.run_many()/run()/gather(). returncode is None (and error set) if it timed out or couldn't start
+cmdResult = namedtuple('cmdResult', ['index', 'com', 'returncode', 'stdout', 'stderr', 'seconds', 'error'])
+
+# yields com's stdout line by line (decoded, without the newline) while it runs. The pipe is only read as lines are
+# consumed, so a slow consumer stalls the child rather than buffering its output. Closing the generator early (or an
+# exception in the consumer) kills the child, check=True raises CalledProcessError if it exits non-zero.
+def lines(com, env=None, cwd=None, check=True):
+	use_shell = isinstance(com, str)
+	# string commands get their own process group, so killing it takes /bin/sh's children too
+	proc = subprocess.Popen(com, shell=use_shell, env=_env(env), cwd=cwd, stdout=subprocess.PIPE, start_new_session=use_shell, text=True, errors='replace')
+	finished = False
+	try:
+		for line in proc.stdout:
+			yield line.rstrip('\n')
+		finished = True
+	finally:
+		if not finished:
+			_kill(proc, use_shell)
+		proc.stdout.close()
+		returncode = proc.wait()
+	if check and returncode != 0:
+		raise subprocess.CalledProcessError(returncode, com)
+
+async def _spawn(com, env, cwd, stderr=None):
+	if isinstance(com, str):
+		return await asyncio.create_subprocess_shell(com, env=_env(env), cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=stderr, start_new_session=True, limit=_LINE_LIMIT)
+	return await asyncio.create_subprocess_exec(*com, env=_env(env), cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=stderr, limit=_LINE_LIMIT)
+
+class commandErrors(Exception):# raised by run_many(check=True) once every command is done, .failures lists them
+	def __init__(self, failures, total):
+		self.failures = failures
+		self.total = total
+		lines = [f"{len(failures)} of {total} commands failed:"]
+		for result in failures:
+			lines.append(f"  [{result.index}] {result.com}: {result.error or f'exit status {result.returncode}'}")
+		super().__init__("\n".join(lines))
 
 class shell():
 	def __init__(self, com=None, sudo=False):
@@ -8,7 +73,7 @@ class shell():
 		self.HOME = self.get_home()
 		self.COMMAND = com
 		if self.COMMAND is not None:
-			self.RESULTS = self.execute(self.COMMAND)
+			self.RESULTS = self.sh(self.COMMAND)
 		else:
 			self.RESULTS = None
 
@@ -21,12 +86,123 @@ class shell():
 	def get_home(self):
 		return os.environ['HOME']
 
-	def sh(self, com):
+	def _sudo(self, com):
 		if self.SUDO:
-			com = f"sudo {com}"
-		out = subprocess.check_output(com, shell=True).decode().strip()
-		if "\n" in out:
-			return out.splitlines()
-		else:
-			return out
-		
+			return f"sudo {com}" if isinstance(com, str) else ['sudo', *com]
+		return com
+
+	# com: an argv list/tuple, exec'd directly, or a string, run through /bin/sh (pipes, globs, ';' etc).
+	# env: variables added to os.environ for the child, cwd: directory to run it in (instead of a 'cd "...";' prefix)
+	def sh(self, com, env=None, cwd=None):
+		com = self._sudo(com)
+		out = subprocess.check_output(com, shell=isinstance(com, str), env=_env(env), cwd=cwd).decode().strip()
+		return _output(out)
+
+	def lines(self, com, env=None, cwd=None, check=True):# streaming sh(), see lines() above
+		com = self._sudo(com)
+		return lines(com, env=env, cwd=cwd, check=check)
+
+	def _run_one(self, index, com, env=None, cwd=None, timeout=None):
+		com = self._sudo(com)
+		use_shell = isinstance(com, str)
+		start = time.perf_counter()
+		try:
+			# string commands get their own process group, so a timeout kills /bin/sh's children too
+			proc = subprocess.Popen(com, shell=use_shell, env=_env(env), cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=use_shell)
+		except OSError as e:
+			return cmdResult(index, com, None, '', '', time.perf_counter() - start, str(e))
+		try:
+			out, err = proc.communicate(timeout=timeout)
+		except subprocess.TimeoutExpired:
+			_kill(proc, use_shell)
+			out, err = proc.communicate()
+			return cmdResult(index, com, None, out.decode(errors='replace').strip(), err.decode(errors='replace').strip(), time.perf_counter() - start, f"timed out after {timeout}s")
+		except BaseException:
+			_kill(proc, use_shell)
+			proc.wait()
+			raise
+		return cmdResult(index, com, proc.returncode, out.decode(errors='replace').strip(), err.decode(errors='replace').strip(), time.perf_counter() - start, None)
+
+	# runs a batch of commands on up to 'workers' threads and yields a cmdResult for each: as they finish, or in the
+	# order given with ordered=True. A command is an argv list, a string, or a dict with 'com' and optionally
+	# 'env'/'cwd'/'timeout' overriding the batch-wide ones. check=True raises commandErrors after the last result if
+	# any command failed, timed out or couldn't start. Closing the generator early cancels commands not yet started.
+	def run_many(self, commands, workers=8, timeout=None, env=None, cwd=None, ordered=False, check=False):
+		jobs = []
+		for index, com in enumerate(commands):
+			if isinstance(com, dict):
+				jobs.append((index, com['com'], com.get('env', env), com.get('cwd', cwd), com.get('timeout', timeout)))
+			else:
+				jobs.append((index, com, env, cwd, timeout))
+		failures = []
+		executor = ThreadPoolExecutor(max_workers=workers)
+		try:
+			futures = [executor.submit(self._run_one, *job) for job in jobs]
+			for future in (futures if ordered else as_completed(futures)):
+				result = future.result()
+				if result.returncode != 0:
+					failures.append(result)
+				yield result
+		finally:
+			executor.shutdown(wait=False, cancel_futures=True)
+		if check and failures:
+			failures.sort(key=lambda result: result.index)
+			raise commandErrors(failures, len(jobs))
+
+	# asyncio counterparts: run() awaits one command and returns its cmdResult (check=True raises CalledProcessError
+	# instead of returning a failure), stream() is an async generator of output lines (closing or cancelling it kills
+	# the child), gather() runs a batch with at most 'limit' children alive at once and returns results in order.
+	async def run(self, com, env=None, cwd=None, timeout=None, check=False, index=0):
+		com = self._sudo(com)
+		start = time.perf_counter()
+		try:
+			proc = await _spawn(com, env, cwd, stderr=asyncio.subprocess.PIPE)
+		except OSError as e:
+			if check:
+				raise
+			return cmdResult(index, com, None, '', '', time.perf_counter() - start, str(e))
+		try:
+			stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+		except asyncio.TimeoutError:
+			_kill(proc, isinstance(com, str))
+			await proc.wait()
+			if check:
+				raise subprocess.TimeoutExpired(com, timeout)
+			return cmdResult(index, com, None, '', '', time.perf_counter() - start, f"timed out after {timeout}s")
+		except BaseException:# cancelled
+			_kill(proc, isinstance(com, str))
+			await proc.wait()
+			raise
+		stdout, stderr = stdout.decode(errors='replace').strip(), stderr.decode(errors='replace').strip()
+		if check and proc.returncode != 0:
+			raise subprocess.CalledProcessError(proc.returncode, com, stdout, stderr)
+		return cmdResult(index, com, proc.returncode, stdout, stderr, time.perf_counter() - start, None)
+
+	async def stream(self, com, env=None, cwd=None, check=True):
+		com = self._sudo(com)
+		proc = await _spawn(com, env, cwd)
+		finished = False
+		try:
+			async for line in proc.stdout:
+				yield line.decode(errors='replace').rstrip('\n')
+			finished = True
+		finally:
+			if not finished:
+				_kill(proc, isinstance(com, str))
+			returncode = await proc.wait()
+		if check and returncode != 0:
+			raise subprocess.CalledProcessError(returncode, com)
+
+	async def gather(self, commands, limit=32, timeout=None, env=None, cwd=None, check=False):
+		# commands as for run_many(). check=True raises commandErrors once all are done if any failed
+		semaphore = asyncio.Semaphore(limit)
+		async def bounded(index, com):
+			options = com if isinstance(com, dict) else {'com': com}
+			async with semaphore:
+				return await self.run(options['com'], options.get('env', env), options.get('cwd', cwd), options.get('timeout', timeout), index=index)
+		results = await asyncio.gather(*(bounded(index, com) for index, com in enumerate(commands)))
+		if check:
+			failures = [result for result in results if result.returncode != 0]
+			if failures:
+				raise commandErrors(failures, len(results))
+		return results
@@ -1,6 +1,18 @@
+import asyncio
+import csv
+import json
 import sqlite3
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import operator
 import os
+import re
+import threading
+import time
+import urllib.parse
+import weakref
+from collections import namedtuple
 from helper_utils.log import logger
 
 """test_table_data = {'table': 'test', 'values': {'key1': 0, 'key2': 'fart', 'key3': 0}}
@@ -9,83 +21,474 @@ test_table_create_data = {'table': 'test', 'values': {'key1': {'primary': '1', '
 logger = logger(verbose=True)
 log = logger.log_msg
 
+_DDL = re.compile(r'\s*(CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+# one column of PRAGMA table_info, plus the python type its declared type maps to (sqlite affinity rules)
+sqlColumn = namedtuple('sqlColumn', ['cid', 'name', 'data_type', 'not_null', 'default', 'is_primary', 'py_type'])
+
+def _py_type(data_type):
+	data_type = data_type.upper()
+	if 'INT' in data_type:
+		return int
+	if 'BOOL' in data_type:
+		return bool
+	if 'CHAR' in data_type or 'CLOB' in data_type or 'TEXT' in data_type:
+		return str
+	if 'BLOB' in data_type or not data_type:
+		return bytes
+	if 'REAL' in data_type or 'FLOA' in data_type or 'DOUB' in data_type:
+		return float
+	return object# NUMERIC affinity, could be anything
+
+class schemaCache():
+	# process-wide table schemas, keyed by database. Tables are read lazily with PRAGMA table_info and served from
+	# memory afterwards. create_table()/DDL through send() drop entries immediately; changes made by other
+	# connections/processes are caught by re-checking PRAGMA schema_version at most every 'check_interval' seconds.
+	def __init__(self, check_interval=1.0):
+		self.check_interval = check_interval
+		self._lock = threading.Lock()
+		self._databases = {}# key: [schema_version, checked_at, {table: (columns, column_dicts)}]
+
+	def lookup(self, key, table, conn):
+		now = time.monotonic()
+		entry = self._databases.get(key)
+		if entry is None or now - entry[1] > self.check_interval:
+			version = conn.execute("PRAGMA schema_version;").fetchone()[0]
+			with self._lock:
+				entry = self._databases.get(key)
+				if entry is None or entry[0] != version:
+					entry = [version, now, {}]
+					self._databases[key] = entry
+				else:
+					entry[1] = now
+		tables = entry[2]
+		try:
+			return tables[table]
+		except KeyError:
+			pass
+		columns = OrderedDict()
+		column_dicts = {}
+		for cid, name, data_type, not_null, default, is_primary in conn.execute(f"PRAGMA table_info=\'{table}\';").fetchall():
+			columns[name] = sqlColumn(cid, name, data_type, bool(not_null), default, bool(is_primary), _py_type(data_type))
+			column_dicts[name] = {'row_id': cid, 'data_type': data_type, 'is_required': not_null, 'is_primary': is_primary}
+		if columns:# don't cache tables that don't exist (yet)
+			with self._lock:
+				tables[table] = (columns, column_dicts)
+		return columns, column_dicts
+
+	def invalidate(self, key=None, table=None):
+		with self._lock:
+			if key is None:
+				self._databases.clear()
+			elif table is None:
+				self._databases.pop(key, None)
+			elif key in self._databases:
+				self._databases[key][2].pop(table, None)
+
+SCHEMA_CACHE = schemaCache()
+
+def _row_converter(cur, row_type, column):# row -> output value for stream(), None to yield rows as they are
+	names = [d[0] for d in cur.description or ()]
+	if column is not None:
+		index = names.index(column) if isinstance(column, str) else column
+		return operator.itemgetter(index)
+	if row_type == 'dict':
+		return lambda row: dict(zip(names, row))
+	if row_type == 'namedtuple':
+		return namedtuple('row', names, rename=True)._make
+	return None
+
+_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl'}
+
+def _file_format(filepath, fmt, caller):
+	if fmt is None:
+		fmt = _FORMATS.get(os.path.splitext(filepath)[1].lower())
+	if fmt not in ('csv', 'jsonl'):
+		txt = f"{caller}:Error - unknown file format for {filepath}: {fmt} (use 'csv' or 'jsonl')!"
+		log(txt, 'error')
+		raise Exception(txt)
+	return fmt
+
+# BLOBs are written to .csv/.jsonl as '\\x' + hex (like PostgreSQL's bytea output) and decoded again on import into
+# BLOB (or untyped) columns
+_BLOB_PREFIX = '\\x'
+
+def _export_value(value):
+	if isinstance(value, bytes):
+		return _BLOB_PREFIX + value.hex()
+	return value
+
+def _export_json(value):# json.dumps(default=...), only called for values json can't encode
+	if isinstance(value, bytes):
+		return _BLOB_PREFIX + value.hex()
+	raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+_JSON_EXPORT = json.JSONEncoder(default=_export_json)
+
+def _import_blob(value):# '\\x<hex>' -> bytes, anything else is stored as is
+	if isinstance(value, str) and value.startswith(_BLOB_PREFIX):
+		try:
+			return bytes.fromhex(value[len(_BLOB_PREFIX):])
+		except ValueError:
+			pass
+	return value
+
+def _csv_converter(py_type):# csv field (str) -> value for a column of this type, '' is NULL for non-text columns
+	if py_type is str:
+		return str
+	if py_type is bool:
+		return lambda value: None if value == '' else int(value.lower() in ('1', 'true', 'yes', 'y'))
+	if py_type in (int, float):
+		return lambda value: None if value == '' else py_type(value)
+	if py_type is bytes:
+		return lambda value: None if value == '' else _import_blob(value)
+	return lambda value: None if value == '' else value
+
+def _io_report(caller, what, rows, seconds):
+	rate = rows / seconds if seconds else 0.0
+	log(f"{caller}:{what}: {rows} rows in {seconds:.2f}s ({rate:.0f} rows/s)", 'info')
+	return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rate}
+
+class _threadConn():# per-thread holder in sql._local, dropped (and finalized) when its thread exits
+	__slots__ = ('conn', '__weakref__')
+
+	def __init__(self, conn):
+		self.conn = conn
+
+def _release(lock, connections, conn):# thread exit: unpool and close its connection, unless close() already did
+	with lock:
+		if conn not in connections:
+			return
+		connections.remove(conn)
+	try:
+		conn.close()
+	except sqlite3.Error:
+		pass
+
+# pragmas applied to every new connection. 'wal' lets readers run during writes (one writer at a time, the others
+# wait up to busy_timeout instead of failing with "database is locked") and trades full fsync per commit for speed.
+# journal_mode=WAL is persistent: it converts the database file, not just the connection.
+PROFILES = {
+	'default': {},
+	'wal': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -65536, 'mmap_size': 268435456, 'busy_timeout': 5000, 'temp_store': 'MEMORY'},
+}
+_WRITE_PRAGMAS = ('journal_mode', 'synchronous')# not allowed (or pointless) on read-only connections
+
+# connections are opened lazily, one per thread, and reused until close() (or the end of a 'with' block).
+# profile: a PROFILES name or a dict of pragmas. readers=True sends query()/stream() through separate, per-thread
+# read-only connections (useful with 'wal', where they never block the writer).
 class sql():
-	def __init__(self, database=None):
+	def __init__(self, database=None, profile='default', readers=False):
 		if database is None:
 			txt = f"sqlite3.create_connection():Error - no database file provided!"
 			log(txt, 'error')
 			raise Exception(txt)
 		self.database = database
+		if database == ':memory:':# private to each connection, so never shared
+			self._schema_key = f":memory:{id(self)}"
+		elif database.startswith('file:'):
+			self._schema_key = database
+		else:
+			self._schema_key = os.path.abspath(database)
+		if isinstance(profile, str):
+			try:
+				profile = PROFILES[profile]
+			except KeyError:
+				txt = f"sql.__init__():Error - unknown profile:{profile}!"
+				log(txt, 'error')
+				raise Exception(txt)
+		self.pragmas = dict(profile)
+		# a private :memory: database can't be opened twice, so it always reads through the writer connection
+		self.readers = readers and database != ':memory:' and not database.startswith('file:')
+		self._local = threading.local()
+		self._connections = []
+		self._lock = threading.Lock()
 
-	def query(self, query_string):
-		conn = sqlite3.connect(self.database)
-		cur = conn.cursor()
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def _hold(self, conn):# wraps a thread's connection so it's closed and unpooled when the thread exits
+		holder = _threadConn(conn)
+		weakref.finalize(holder, _release, self._lock, self._connections, conn)
+		return holder
+
+	def _open(self, read_only=False):
+		# check_same_thread=False only so close() can run from any thread; each connection is used by its own thread
+		if read_only:
+			conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(self.database))}?mode=ro", uri=True, check_same_thread=False)
+		else:
+			conn = sqlite3.connect(self.database, check_same_thread=False)
+		for pragma, value in self.pragmas.items():
+			if not (read_only and pragma in _WRITE_PRAGMAS):
+				conn.execute(f"PRAGMA {pragma}={value};")
+		with self._lock:
+			self._connections.append(conn)
+		return conn
+
+	def connect(self):# this thread's connection, opened on first use
+		holder = getattr(self._local, 'conn', None)
+		if holder is None:
+			holder = self._hold(self._open())
+			self._local.conn = holder
+		return holder.conn
+
+	def reader(self):# this thread's read-only connection (or connect() when readers are off)
+		if not self.readers:
+			return self.connect()
+		holder = getattr(self._local, 'reader', None)
+		if holder is None:
+			if getattr(self._local, 'conn', None) is None and not os.path.exists(self.database):
+				self.connect()# read-only can't create the file
+			holder = self._hold(self._open(read_only=True))
+			self._local.reader = holder
+		return holder.conn
+
+	def close(self):# closes every pooled connection, the next call reconnects
+		with self._lock:
+			connections = list(self._connections)
+			self._connections.clear()# cleared in place: the thread finalizers hold this list
+			old_local, self._local = self._local, threading.local()
+		del old_local# its holders' finalizers take the lock, so they must run after it's released
+		for conn in connections:
+			try:
+				conn.close()
+			except sqlite3.Error as e:
+				log(f"sql.close():Error closing connection - {e}", 'warning')
+
+	@logger.timed('sql.query')
+	def query(self, query_string, params=()):# first column of every row, as a list
+		return list(self.stream(query_string, params, column=0))
+
+	# yields rows lazily, fetching 'batch_size' at a time, so memory stays flat on big tables.
+	# row_type: 'tuple', 'dict' or 'namedtuple'. column: an index or name to yield just that column's values.
+	def stream(self, query_string, params=(), row_type='tuple', batch_size=1000, column=None):
+		cur = self.reader().cursor()
 		try:
-			out = []
-			cur.execute(query_string)
-			rows = cur.fetchall()
-			for row in rows:
-				out.append(row[0])
-			return out
-		except Exception as e:
-			txt = f"sql.send():Error querying database - {e}, query_string={query_string}!"
-			log(txt, 'error')
-			raise Exception(txt)
+			try:
+				cur.execute(query_string, params)
+			except Exception as e:
+				txt = f"sql.stream():Error querying database - {e}, query_string={query_string}!"
+				log(txt, 'error')
+				raise Exception(txt)
+			convert = _row_converter(cur, row_type, column)
+			while True:
+				rows = cur.fetchmany(batch_size)
+				if not rows:
+					break
+				if convert is None:
+					yield from rows
+				else:
+					yield from map(convert, rows)
+		finally:
+			cur.close()
 
+	@logger.timed('sql.send')
 	def send(self, query_string):
-		conn = sqlite3.connect(self.database)
+		conn = self.connect()
 		cur = conn.cursor()
 		try:
 			cur.execute(query_string)
 			conn.commit()
+			if _DDL.match(query_string):
+				SCHEMA_CACHE.invalidate(self._schema_key)
 		except Exception as e:
+			conn.rollback()
 			txt = f"sql.send():Error sending to sql - {e}, query_string={query_string}!"
 			log(txt, 'error')
 			raise Exception(txt)
+		finally:
+			cur.close()
 
-	def get_columns(self, table):
-		conn = sqlite3.connect(self.database)
-		cur = conn.cursor()
-		query_string = f"PRAGMA table_info=\'{table}\';"
-		cur.execute(query_string)
-		rows = cur.fetchall()
-		ct = len(rows)
-		columns = {}
-		for row in rows:
-			row_data = {}
-			row_id, column, data_type, is_required, notaclue, is_primary = row
-			row_data['row_id'] = row_id
-			row_data['data_type'] = data_type
-			row_data['is_required'] = is_required
-			row_data['is_primary'] = is_primary
-			columns[column] = row_data
-		return columns
+	@logger.timed('sql.get_columns')
+	def get_columns(self, table):# cached, don't modify the returned dict
+		return SCHEMA_CACHE.lookup(self._schema_key, table, self.connect())[1]
 
+	def get_schema(self, table):# OrderedDict of column name: sqlColumn, in table order (cached)
+		return SCHEMA_CACHE.lookup(self._schema_key, table, self.connect())[0]
+
+	def invalidate_schema(self, table=None):
+		SCHEMA_CACHE.invalidate(self._schema_key, table)
+
+	@logger.timed('sql.insert')
 	def insert(self, data):
 		table = data['table']
-		columns = sql.get_columns(table)
+		columns = self.get_columns(table)
 		d = data['values']
-		keys = []
-		vals = []
+		row = {}
 		for key in d.keys():
-			dtype = columns[key]['data_type']
-			print(dtype)
-			if dtype == 'INTEGER' or dtype == 'BOOL':
-				val = f"{d[key]}"
-			elif dtype == 'TEXT':
-				val = f"'{d[key]}'"
 			#required = bool(int(columns[key]['is_required']))
 			primary = bool(int(columns[key]['is_primary']))
 			if not primary:
-				keys.append(f"'{key}'")
-				vals.append(val)
-		keys = ", ".join(keys)
-		vals = ", ".join(vals)
-		query_string = f"INSERT INTO {table} ({keys}) VALUES({vals});"
-		log(f"sql.insert():query_string={query_string}", 'info')
-		sql.send(query_string)
+				row[key] = d[key]
+		log(f"sql.insert():table={table}, values={row}", 'info')
+		self.insert_many(table, [row])
+
+	# INSERT statement for 'keys' of 'table' (pre-quoted, e.g. '"main"."test"'), taking values from 'source'
+	# ('VALUES (...)' or a SELECT ending in 'WHERE true', which sqlite needs before ON CONFLICT)
+	def _insert_statement(self, table, quoted_table, keys, source, on_conflict=None, conflict_columns=None, caller='sql.insert_many()'):
+		names = ", ".join(f'"{key}"' for key in keys)
+		if on_conflict is None:
+			return f'INSERT INTO {quoted_table} ({names}) {source}'
+		if on_conflict in ('replace', 'ignore'):
+			return f'INSERT OR {on_conflict.upper()} INTO {quoted_table} ({names}) {source}'
+		if on_conflict == 'update':
+			if conflict_columns is None:
+				columns = self.get_columns(table)
+				conflict_columns = [column for column in columns if columns[column]['is_primary']]
+			updates = ", ".join(f'"{key}"=excluded."{key}"' for key in keys if key not in conflict_columns)
+			target = ", ".join(f'"{column}"' for column in conflict_columns)
+			action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+			return f'INSERT INTO {quoted_table} ({names}) {source} ON CONFLICT({target}) {action}'
+		txt = f"{caller}:Error - unknown on_conflict mode:{on_conflict}!"
+		log(txt, 'error')
+		raise Exception(txt)
+
+	# executemany 'rows' in transactions of 'chunk_size', returns the number of rows sent
+	def _next_chunk(self, rows, chunk_size, total, table, caller):# bad input rows (missing keys, bad values) raise here
+		try:
+			return list(itertools.islice(rows, chunk_size))
+		except Exception as e:
+			txt = f"{caller}:Error reading rows for {table} after {total} rows - {e!r}!"
+			log(txt, 'error')
+			raise Exception(txt)
+
+	def _send_chunks(self, conn, query_string, rows, chunk_size, table, caller='sql.insert_many()'):
+		rows = iter(rows)
+		total = 0
+		chunk = self._next_chunk(rows, chunk_size, total, table, caller)
+		while chunk:
+			try:
+				conn.executemany(query_string, chunk)
+				conn.commit()
+			except Exception as e:
+				conn.rollback()
+				txt = f"{caller}:Error inserting into {table} after {total} rows - {e}, query_string={query_string}!"
+				log(txt, 'error')
+				raise Exception(txt)
+			total += len(chunk)
+			chunk = self._next_chunk(rows, chunk_size, total, table, caller)
+		return total
+
+	# bulk insert: rows is an iterable of dicts (all with the keys of the first row), sent with executemany and bound
+	# parameters, committed every 'chunk_size' rows. on_conflict: None, 'replace', 'ignore' or 'update' (upsert on
+	# 'conflict_columns', by default the table's primary key). Returns the number of rows sent.
+	@logger.timed('sql.insert_many')
+	def insert_many(self, table, rows, chunk_size=10000, on_conflict=None, conflict_columns=None):
+		rows = iter(rows)
+		first = next(rows, None)
+		if first is None:
+			return 0
+		keys = list(first.keys())
+		params = ", ".join(f":{key}" for key in keys)
+		query_string = self._insert_statement(table, f'"{table}"', keys, f"VALUES ({params})", on_conflict, conflict_columns)
+		return self._send_chunks(self.connect(), query_string, itertools.chain([first], rows), chunk_size, table)
+
+	# streams a .csv (header row = column names) or .jsonl file into an existing table in chunked executemany
+	# transactions. CSV strings are converted with the column types from get_schema(); columns the table doesn't have
+	# are skipped. staging=True loads into an ATTACHed in-memory copy first and merges it with one INSERT ... SELECT.
+	# Returns {'rows', 'seconds', 'rows_per_sec'}.
+	@logger.timed('sql.import_file')
+	def import_file(self, table, filepath, fmt=None, chunk_size=10000, on_conflict=None, conflict_columns=None, staging=False):
+		fmt = _file_format(filepath, fmt, 'sql.import_file()')
+		schema = self.get_schema(table)
+		if not schema:
+			txt = f"sql.import_file():Error - no such table:{table}!"
+			log(txt, 'error')
+			raise Exception(txt)
+		start = time.perf_counter()
+		with open(filepath, newline='') as f:
+			if fmt == 'csv':
+				reader = csv.reader(f)
+				header = next(reader, [])
+				keys = [key for key in header if key in schema]
+				positions = [header.index(key) for key in keys]
+				converters = [_csv_converter(schema[key].py_type) for key in keys]
+				rows = (tuple(convert(values[i]) for i, convert in zip(positions, converters)) for values in reader if values)
+			else:
+				lines = (line for line in f if line.strip())
+				first = next(lines, None)
+				if first is None:
+					return {'rows': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+				keys = [key for key in json.loads(first) if key in schema]
+				blobs = [schema[key].py_type is bytes for key in keys]
+				records = map(json.loads, itertools.chain([first], lines))
+				# keys missing from later records are NULL
+				if any(blobs):
+					rows = (tuple(_import_blob(value) if blob else value for value, blob in zip(map(record.get, keys), blobs)) for record in records)
+				else:
+					rows = (tuple(map(record.get, keys)) for record in records)
+			if not keys:
+				txt = f"sql.import_file():Error - {filepath} has no columns of {table}!"
+				log(txt, 'error')
+				raise Exception(txt)
+			params = ", ".join("?" for key in keys)
+			conn = self.connect()
+			if staging:
+				total = self._import_staged(conn, table, keys, params, rows, chunk_size, on_conflict, conflict_columns)
+			else:
+				query_string = self._insert_statement(table, f'"{table}"', keys, f"VALUES ({params})", on_conflict, conflict_columns, 'sql.import_file()')
+				total = self._send_chunks(conn, query_string, rows, chunk_size, table, 'sql.import_file()')
+		return _io_report('sql.import_file()', f"{filepath} -> {table}", total, time.perf_counter() - start)
+
+	def _import_staged(self, conn, table, keys, params, rows, chunk_size, on_conflict, conflict_columns):
+		conn.commit()# ATTACH can't run inside a transaction
+		conn.execute("ATTACH DATABASE ':memory:' AS staging;")
+		try:
+			names = ", ".join(f'"{key}"' for key in keys)
+			conn.execute(f'CREATE TABLE staging."{table}" AS SELECT {names} FROM main."{table}" WHERE 0;')
+			query_string = f'INSERT INTO staging."{table}" ({names}) VALUES ({params})'
+			total = self._send_chunks(conn, query_string, rows, chunk_size, f"staging.{table}", 'sql.import_file()')
+			merge = self._insert_statement(table, f'main."{table}"', keys, f'SELECT {names} FROM staging."{table}" WHERE true', on_conflict, conflict_columns, 'sql.import_file()')
+			try:
+				conn.execute(merge)
+				conn.commit()
+			except Exception as e:
+				conn.rollback()
+				txt = f"sql.import_file():Error merging staged rows into {table} - {e}, query_string={merge}!"
+				log(txt, 'error')
+				raise Exception(txt)
+			return total
+		finally:
+			conn.execute("DETACH DATABASE staging;")
 
+	# streams a table (or 'query_string' with 'params') to .csv (with a header row) or .jsonl, 'batch_size' rows at a
+	# time. Returns {'rows', 'seconds', 'rows_per_sec'}.
+	@logger.timed('sql.export_table')
+	def export_table(self, table, filepath, fmt=None, batch_size=10000, query_string=None, params=()):
+		fmt = _file_format(filepath, fmt, 'sql.export_table()')
+		if query_string is None:
+			query_string = f'SELECT * FROM "{table}";'
+		start = time.perf_counter()
+		total = 0
+		cur = self.reader().cursor()
+		try:
+			cur.execute(query_string, params)
+			names = [d[0] for d in cur.description]
+			with open(filepath, 'w', newline='') as f:
+				if fmt == 'csv':
+					writer = csv.writer(f)
+					writer.writerow(names)
+				while True:
+					rows = cur.fetchmany(batch_size)
+					if not rows:
+						break
+					if fmt == 'csv':
+						writer.writerows(tuple(map(_export_value, row)) for row in rows)
+					else:
+						f.write("".join(_JSON_EXPORT.encode(dict(zip(names, row))) + "\n" for row in rows))
+					total += len(rows)
+		except Exception as e:
+			txt = f"sql.export_table():Error exporting {table} to {filepath} - {e}, query_string={query_string}!"
+			log(txt, 'error')
+			raise Exception(txt)
+		finally:
+			cur.close()
+		return _io_report('sql.export_table()', f"{table} -> {filepath}", total, time.perf_counter() - start)
 
+	@logger.timed('sql.create_table')
 	def create_table(self, data):
 		table = data['table']
 		d = data['values']
@@ -116,4 +519,85 @@ class sql():
 		vals = j.join(vals)
 		query = f"{create} ({vals});"
 		log(f"sql.create_table():query:'{query}'", 'info')
-		sql.send(query)
+		self.send(query)
+
+
+# asyncio front end for sql: every call runs on an executor so the event loop never blocks.
+# Writes (send/insert/insert_many/create_table) go through one writer thread, so they are serialized on a single
+# connection. Reads run on 'max_readers' threads, each with its own read-only connection. Pass profile='wal' for reads
+# that proceed during writes (with 'default' they wait for the writer's commit); note that WAL mode is stored in the
+# database file, so it stays on for every later user of that file. stream() is an async generator fetching one batch
+# per executor call.
+class async_sql():
+	def __init__(self, database=None, profile='default', readers=True, max_readers=4):
+		self.db = sql(database, profile=profile, readers=readers)
+		self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='async_sql_writer')
+		if self.db.readers:
+			self._readers = ThreadPoolExecutor(max_workers=max_readers, thread_name_prefix='async_sql_reader')
+		else:# a :memory: database only exists on the writer's connection
+			self._readers = self._writer
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, *args):
+		await self.close()
+
+	async def _run(self, executor, func, *args, **kwargs):
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(executor, lambda: func(*args, **kwargs))
+
+	async def query(self, query_string, params=()):
+		return await self._run(self._readers, self.db.query, query_string, params)
+
+	async def send(self, query_string):
+		return await self._run(self._writer, self.db.send, query_string)
+
+	async def insert(self, data):
+		return await self._run(self._writer, self.db.insert, data)
+
+	async def insert_many(self, table, rows, chunk_size=10000, on_conflict=None, conflict_columns=None):
+		return await self._run(self._writer, self.db.insert_many, table, rows, chunk_size, on_conflict, conflict_columns)
+
+	async def create_table(self, data):
+		return await self._run(self._writer, self.db.create_table, data)
+
+	async def get_columns(self, table):
+		return await self._run(self._readers, self.db.get_columns, table)
+
+	async def stream(self, query_string, params=(), row_type='tuple', batch_size=1000, column=None):
+		# a dedicated connection, since successive batches may be fetched by different reader threads
+		if self.db.readers:
+			conn = await self._run(self._readers, self.db._open, True)
+		else:
+			conn = await self._run(self._writer, self.db.connect)
+		cur = None
+		try:
+			try:
+				cur = await self._run(self._readers, conn.execute, query_string, params)
+			except Exception as e:
+				txt = f"async_sql.stream():Error querying database - {e}, query_string={query_string}!"
+				log(txt, 'error')
+				raise Exception(txt)
+			convert = _row_converter(cur, row_type, column)
+			while True:
+				rows = await self._run(self._readers, cur.fetchmany, batch_size)
+				if not rows:
+					break
+				for row in rows if convert is None else map(convert, rows):
+					yield row
+		finally:
+			if cur is not None:
+				cur.close()
+			if self.db.readers:
+				with self.db._lock:
+					if conn in self.db._connections:
+						self.db._connections.remove(conn)
+				conn.close()
+
+	async def close(self):
+		await self._run(self._writer, lambda: None)# let queued writes finish
+		self._writer.shutdown(wait=True)
+		if self._readers is not self._writer:
+			self._readers.shutdown(wait=True)
+		self.db.close()
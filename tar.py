@@ -1,8 +1,8 @@
-import subprocess
 import tarfile
 import glob
 import os
 from helper_utils.log import logger
+from helper_utils.sh import lines
 logfile = os.path.join(os.path.expanduser("~"), 'new_project_helper.log')
 logger = logger(logfile=logfile, verbose=True)
 log = logger.log_msg
@@ -37,20 +37,26 @@ class tar():
 		return read_mode, write_mode, ext
 			
 
+	@logger.timed('tar.get_files')
 	def get_files(self, target_dir=None):
 		"""Uses subprocess to find all files in a given path and returns a list.
 		If none found, returns empty list and logs the error."""
 
-		if target_dir is not None:
-			self.target_dir = target_dir
-		com = f"find \"{self.target_dir}\" -name \"*.*\""
 		try:
-			files = subprocess.check_output(com, shell=True).decode().strip().splitlines()
+			files = list(self.iter_files(target_dir))
 		except Exception as e:
 			log(f"Error getting files:{e}", 'error')
 			files = []
 		return files
 
+	def iter_files(self, target_dir=None):
+		"""Like get_files(), but yields paths as 'find' prints them. Errors are raised instead of logged."""
+
+		if target_dir is not None:
+			self.target_dir = target_dir
+		yield from lines(["find", self.target_dir, "-name", "*.*"])
+
+	@logger.timed('tar.add_file')
 	def add_file(self, target, tar_file):
 		"""Adds 'target' to 'tar_file'.
 		If compression scheme not provided, uses 'tar' extension (no compression)"""
@@ -80,6 +86,7 @@ class tar():
 		log(f"tar.detect_compression():Changed read/write mode! Read:{self.read_mode}, Write:{self.write_mode}", 'info')
 		return mode
 
+	@logger.timed('tar.extract')
 	def extract(self, tar_file, target_dir=None):
 		"""Extracts and archive to either the current working directory or provided target_dir.
 		Detects compression method and sets mode with above 'detect_compression' method.
@@ -109,6 +116,7 @@ class tar():
 				pass
 		return test1
 
+	@logger.timed('tar.add_directory')
 	def add_directory(self, target_dir=None, archive_name=None):
 		"""Adds the contents (all files/folders) to an archive ('target_dir').
 		If compression scheme is None, uses 'tar' extension (no compression)."""